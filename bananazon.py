@@ -535,7 +535,7 @@ def admin_dashboard(controller: OrderController):
         elif choice == "2":
             count = InventoryManager.archive_empty_batches()
             print(f"\n✅ CLEANUP: {count} depleted batches moved to archive.")
-            controller.inventory.batches = controller.batch_repo.load_all_batches()
+            controller.inventory.reload(controller.batch_repo.load_all_batches())
             time.sleep(1.5)
         
         elif choice == "3":
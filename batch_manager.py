@@ -1,20 +1,285 @@
+import argparse
+import bisect
+import csv
 import json
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
 from pathlib import Path
 from src.models.banana_batch import BananaBatch
 from src.models.banana_sample import BananaSample
 from src.models.banana import Banana
 from src.repository.batch_repository import BatchRepository
+from src.capture_store import CaptureSegmentReader, HEADER, SEGMENT_SUFFIX
+
+RESULTS_DIR = Path("data/results")
+MANIFEST_NAME = "import_manifest.json"  # Kept next to the captures, not among the batch files
+MATCH_TOLERANCE_S = 300  # Scale-log readings further than this from a capture don't count
 
 def clear_screen():
     os.system('cls' if os.name == 'nt' else 'clear')
 
-def process_raw_captures_to_batches():
-    results_dir = Path("data/results")
+# --- CAPTURE DISCOVERY ---
+
+def capture_files(results_dir: Path) -> list:
+    """Capture segments and legacy JSON files, including per-station subfolders."""
+    files = list(results_dir.rglob(f"captures_*{SEGMENT_SUFFIX}"))
+    files += list(results_dir.rglob("banana_sample_*.json"))
+    return sorted(files)
+
+def _parse_capture_file(path: str, name: str) -> list:
+    """Worker entry: one file -> [(source, timestamp, detections)]. Runs in a process pool."""
+    if path.endswith(SEGMENT_SUFFIX):
+        if os.path.getsize(path) < HEADER.size:
+            return []  # Created but never written to, or cut off inside the header
+        with CaptureSegmentReader(path) as reader:
+            return [(f"{name}#{i}", c["timestamp"], c["detections"]) for i, c in enumerate(reader)]
+
+    with open(path, "r") as f:
+        data = json.load(f)
+    return [(name, data.get("timestamp"), data.get("detections") or [])]
+
+# --- PROCESSED-CAPTURE MANIFEST ---
+
+def load_manifest(path: Path) -> dict:
+    if not path.exists():
+        return {"files": {}, "captures": [], "weights": {}}
+    with open(path, "r") as f:
+        manifest = json.load(f)
+    manifest.setdefault("weights", {})  # weight key -> batch_id, see bulk_import
+    return manifest
+
+def save_manifest(manifest: dict, path: Path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, path)
+
+def _file_signature(file: Path) -> list:
+    st = file.stat()
+    return [st.st_size, st.st_mtime_ns]
+
+# --- WEIGHTS ---
+
+def _parse_time(value: str):
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+def _parse_reading(parts: list):
+    """(timestamp, kg) from '<ts> <kg>' or '<date> <time> <kg>'; None if neither fits."""
+    candidates = [(parts[0], parts[1:2])]
+    if len(parts) >= 3:
+        candidates.append((f"{parts[0]} {parts[1]}", parts[2:3]))
+    for when, kg in candidates:
+        if not kg:
+            continue
+        try:
+            return _parse_time(when), float(kg[0])
+        except ValueError:
+            continue
+    return None
+
+def load_weights(path: Path):
+    """
+    Batch weights from a CSV or a scale log. Returns (by_source, timeline):
+      CSV with a source/file column:  source,weight_kg -> matched by capture name
+      CSV with a timestamp column:    timestamp,weight_kg -> nearest capture
+      Scale log (no header):          <unix ts or ISO time> <kg> per line
+                                      (ISO times may use a space: 2026-10-17 10:00:00 12.5)
+    """
+    by_source, timeline = {}, []
+    with open(path, "r", newline="") as f:
+        first = f.readline().replace(",", " ").split()
+        f.seek(0)
+
+        # A header row is one whose first field is not a time
+        has_header = False
+        if first:
+            try:
+                _parse_time(first[0])
+            except ValueError:
+                has_header = True
+
+        if has_header:
+            for row in csv.DictReader(f):
+                row = {k.strip().lower(): (v or "").strip() for k, v in row.items() if k}
+                weight = row.get("weight_kg") or row.get("weight") or row.get("kg")
+                if not weight:
+                    continue
+                key = row.get("source") or row.get("file")
+                if key:
+                    by_source[Path(key).name] = float(weight)
+                elif row.get("timestamp"):
+                    timeline.append((_parse_time(row["timestamp"]), float(weight)))
+        else:
+            skipped = 0
+            for line in f:
+                parts = line.replace(",", " ").split()
+                if not parts:
+                    continue
+                reading = _parse_reading(parts)
+                if reading is None:
+                    skipped += 1  # Scale chatter, units-only lines, etc.
+                    continue
+                timeline.append(reading)
+            if skipped:
+                print(f"⚠️ Skipped {skipped} unreadable line(s) in {Path(path).name}")
+
+    timeline.sort()
+    return by_source, timeline
+
+def match_weight(source: str, timestamp, by_source: dict, timeline: list,
+                 tolerance: float = MATCH_TOLERANCE_S):
+    """
+    Exact capture name (with or without #index / extension) first, then nearest
+    scale reading. Returns (weight_key, kg) or None; every capture that maps to
+    the same key was weighed together and belongs to the same batch.
+    """
+    name = Path(source).name
+    for key in (name, name.split("#")[0], Path(name.split("#")[0]).stem):
+        if key in by_source:
+            return f"source:{key}", by_source[key]
+
+    if timestamp is None or not timeline:
+        return None
+    times = [t for t, _ in timeline]
+    i = bisect.bisect_left(times, timestamp)
+    candidates = [j for j in (i - 1, i) if 0 <= j < len(timeline)]
+    best = min(candidates, key=lambda j: abs(times[j] - timestamp))
+    if abs(times[best] - timestamp) > tolerance:
+        return None
+    return f"time:{times[best]}", timeline[best][1]
+
+# --- BATCH ASSEMBLY ---
+
+def build_batch(detections: list, timestamp, total_weight: float, banana_type: str = "Cavendish",
+                batch: BananaBatch = None) -> BananaBatch:
+    """Every detection of a capture becomes a sample of its batch (a new one unless given)."""
+    if batch is None:
+        batch = BananaBatch(
+            banana_type=banana_type,
+            total_weight_kg=total_weight,
+            received_date=timestamp
+        )
+    for det in detections:
+        banana = Banana(
+            length_cm=det["length_cm"],
+            ripeness=det["ripeness"],
+            confidence=det["confidence"],
+            mean_hsv=tuple(det["mean_hsv"])
+        )
+        # The pipeline's per-banana shelf life is better than the 7-day fallback
+        batch.add_sample(BananaSample(banana, timestamp or 0), det.get("shelf_life_days"))
+    return batch
+
+def bulk_import(weights_path: Path, results_dir: Path = RESULTS_DIR, workers: int = None,
+                tolerance: float = MATCH_TOLERANCE_S) -> int:
+    """Non-interactive import: parallel parse, weights from file, incremental via the manifest."""
+    start = time.time()
+    repo = BatchRepository()
+    manifest_path = results_dir / MANIFEST_NAME
+    manifest = load_manifest(manifest_path)
+    imported = set(manifest["captures"])
+    by_source, timeline = load_weights(weights_path)
+
+    # Unchanged files were fully handled last time; growing segments are re-read
+    files = [f for f in capture_files(results_dir)
+             if manifest["files"].get(str(f.relative_to(results_dir))) != _file_signature(f)]
+    if not files:
+        print("✅ Nothing new to import.")
+        return 0
+
+    names = [str(f.relative_to(results_dir)) for f in files]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        parsed = list(pool.map(_parse_capture_file, [str(f) for f in files], names, chunksize=16))
+
+    # 1. Group captures by the weight they match: one reading (or one weights
+    #    row) is one weighed batch, however many captures were taken of it
+    groups = {}  # weight_key -> (kg, [(source, timestamp, detections)])
+    empty = unmatched = 0
+    complete_files = []
+    for file, name, captures in zip(files, names, parsed):
+        complete = True
+        for source, timestamp, detections in captures:
+            if source in imported:
+                continue
+            if not detections:
+                empty += 1
+                imported.add(source)
+                continue
+
+            match = match_weight(source, timestamp, by_source, timeline, tolerance)
+            if match is None or match[1] <= 0:
+                # Left for a later run with more scale data
+                unmatched += 1
+                complete = False
+                continue
+            key, weight = match
+            groups.setdefault(key, (weight, []))[1].append((source, timestamp, detections))
+
+        if complete:
+            complete_files.append((file, name))
+
+    # 2. One batch per weight. A weight used by an earlier run gets the new
+    #    samples appended to its batch instead of being counted again
+    saved = 0
+    for key, (weight, members) in groups.items():
+        batch = None
+        batch_id = manifest["weights"].get(key)
+        if batch_id:
+            batch = _load_imported_batch(repo, batch_id)
+            if batch is None:
+                print(f"⚠️ {key} was already imported as batch {batch_id}, which is gone; "
+                      f"{len(members)} capture(s) left pending")
+                unmatched += len(members)
+                pending = {source.split("#")[0] for source, _, _ in members}
+                complete_files = [(f, n) for f, n in complete_files if n not in pending]
+                continue
+        else:
+            saved += 1
+        for source, timestamp, detections in sorted(members, key=lambda m: m[1] or 0):
+            batch = build_batch(detections, timestamp, weight, batch=batch)
+            imported.add(source)
+        repo.save_batch(batch)
+        manifest["weights"][key] = batch.batch_id
+
+    for file, name in complete_files:
+        manifest["files"][name] = _file_signature(file)
+    manifest["captures"] = sorted(imported)
+    save_manifest(manifest, manifest_path)
+
+    elapsed = time.time() - start
+    print(f"🎉 Imported {saved} batches from {len(files)} file(s) in {elapsed:.1f}s "
+          f"({empty} empty captures, {unmatched} without a matching weight)")
+    return saved
+
+def _load_imported_batch(repo: BatchRepository, batch_id: str):
+    path = repo.storage_path / f"{batch_id}.json"
+    if not path.exists():
+        return None
+    with open(path, "r") as f:
+        return BananaBatch.from_dict(json.load(f))
+
+# --- INTERACTIVE FALLBACK ---
+
+def process_raw_captures_to_batches(results_dir: Path = RESULTS_DIR):
     repo = BatchRepository() # Saves to data/batches
+    manifest_path = results_dir / MANIFEST_NAME
+    manifest = load_manifest(manifest_path)
+    imported = set(manifest["captures"])
     
     # 1. Gather all new scans
-    raw_files = list(results_dir.glob("banana_sample_*.json"))
+    raw_files = []
+    for file in capture_files(results_dir):
+        name = str(file.relative_to(results_dir))
+        for source, timestamp, detections in _parse_capture_file(str(file), name):
+            if source not in imported:
+                raw_files.append((source, {"timestamp": timestamp, "detections": detections}))
     
     if not raw_files:
         print("❌ No new scans found in data/results.")
@@ -26,13 +291,12 @@ def process_raw_captures_to_batches():
 
     processed_count = 0
 
-    for file in raw_files:
+    for source, data in raw_files:
         clear_screen()
-        with open(file, "r") as f:
-            data = json.load(f)
         
         if not data.get("detections"):
-            print(f"⚠️ Skipping {file.name} (No detections)")
+            print(f"⚠️ Skipping {source} (No detections)")
+            imported.add(source)
             continue
 
         # Use the first detection as the "Representative Sample"
@@ -40,7 +304,7 @@ def process_raw_captures_to_batches():
         
         # Display the "Sample" stats so you know what batch you are building
         print(f"--- 🍌 PROCESSING BATCH {processed_count + 1}/{len(raw_files)} ---")
-        print(f"📄 Source File: {file.name}")
+        print(f"📄 Source: {source}")
         print(f"📸 Visual Stats (Representative):")
         print(f"   • Ripeness:     {det['ripeness'].upper()}")
         print(f"   • Avg Length:   {det['length_cm']} cm")
@@ -60,36 +324,39 @@ def process_raw_captures_to_batches():
             except ValueError:
                 print("   Invalid number. Try again.")
 
-        # 3. Create the Batch Object
-        batch = BananaBatch(
-            banana_type="Cavendish",
-            total_weight_kg=total_weight,
-            received_date=data.get("timestamp")
-        )
+        # 3. Create the Batch Object (every detection becomes a sample)
+        batch = build_batch(data["detections"], data.get("timestamp"), total_weight)
 
-        # 4. Add the sample (This becomes the mathematical average of the batch)
-        banana = Banana(
-            length_cm=det["length_cm"],
-            ripeness=det["ripeness"],
-            confidence=det["confidence"],
-            mean_hsv=tuple(det["mean_hsv"])
-        )
-        # Use timestamp from file, or current time if missing
-        sample = BananaSample(banana, data.get("timestamp", 0))
-        batch.add_sample(sample)
-
-        # 5. Save
+        # 4. Save, and remember the capture so reruns skip it
         repo.save_batch(batch)
+        imported.add(source)
+        manifest["captures"] = sorted(imported)
+        save_manifest(manifest, manifest_path)
         print(f"\n✅ Batch Saved! (ID: {batch.batch_id} | {total_weight}kg)")
         
-        # Optional: Ask to delete the raw file to avoid re-processing
-        # if input("   Delete raw scan file? (y/n): ").lower() == 'y':
-        #     file.unlink()
-        
         processed_count += 1
         input("\nPress Enter for next batch...")
 
+    manifest["captures"] = sorted(imported)
+    save_manifest(manifest, manifest_path)
     print("\n🎉 All pending scans processed into Inventory!")
 
+def main():
+    parser = argparse.ArgumentParser(description="Turn inspection captures into inventory batches")
+    parser.add_argument("--weights", type=Path, default=None,
+                        help="CSV (source/timestamp,weight_kg) or scale log; enables non-interactive bulk import")
+    parser.add_argument("--results", type=Path, default=RESULTS_DIR, help="Capture directory")
+    parser.add_argument("--workers", type=int, default=None, help="Parser processes (default: CPU count)")
+    parser.add_argument("--tolerance", type=float, default=MATCH_TOLERANCE_S,
+                        help="Max seconds between a capture and its scale reading")
+    args = parser.parse_args()
+
+    if args.weights is None:
+        process_raw_captures_to_batches(args.results)
+        return
+    if not args.weights.exists():
+        raise SystemExit(f"❌ Weights file not found: {args.weights}")
+    bulk_import(args.weights, args.results, args.workers, args.tolerance)
+
 if __name__ == "__main__":
-    process_raw_captures_to_batches()
\ No newline at end of file
+    main()
\ No newline at end of file
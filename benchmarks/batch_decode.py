@@ -0,0 +1,107 @@
+"""
+Batch decode benchmark.
+Builds a synthetic corpus of saved batches and times what a dashboard cold
+start pays per batch: json.loads, BananaBatch.from_dict and the first
+average_quality() / estimated_shelf_life_days() call. Runs once on files with
+computed_stats and once without (older saves), where the stats are rebuilt
+from the samples.
+
+    python -m benchmarks.batch_decode
+    python -m benchmarks.batch_decode --batches 10000 --samples 40 --repeat 5
+"""
+import argparse
+import json
+import random
+import time
+
+import numpy as np
+
+from src.models.banana import Banana
+from src.models.banana_batch import BananaBatch
+from src.models.banana_sample import BananaSample
+
+RIPENESS = ("unripe", "mid-ripe", "ripe")
+
+
+def synthetic_corpus(n_batches: int, n_samples: int, seed: int = 0) -> list:
+    """JSON strings, exactly as BatchRepository.save_batch would write them."""
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(n_batches):
+        batch = BananaBatch("Cavendish", batch_id=f"b{i:06d}", total_weight_kg=rng.uniform(50, 1500),
+                            received_date=1.7e9 + i * 60)
+        for _ in range(n_samples):
+            banana = Banana(
+                length_cm=rng.uniform(12, 26),
+                ripeness=rng.choice(RIPENESS),
+                confidence=rng.uniform(0.5, 0.99),
+                mean_hsv=(rng.uniform(15, 45), rng.uniform(60, 220), rng.uniform(80, 230))
+            )
+            batch.add_sample(BananaSample(banana, batch.received_date), rng.randint(1, 10))
+        corpus.append(json.dumps(batch.to_dict()))
+    return corpus
+
+
+def strip_stats(corpus: list) -> list:
+    stripped = []
+    for text in corpus:
+        data = json.loads(text)
+        data.pop("computed_stats", None)
+        data.pop("schema_version", None)
+        stripped.append(json.dumps(data))
+    return stripped
+
+
+def time_decode(corpus: list, repeat: int) -> dict:
+    parse, decode, stats = [], [], []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        parsed = [json.loads(text) for text in corpus]
+        t1 = time.perf_counter()
+        batches = [BananaBatch.from_dict(data) for data in parsed]
+        t2 = time.perf_counter()
+        for batch in batches:
+            batch.average_quality()
+            batch.estimated_shelf_life_days()
+        t3 = time.perf_counter()
+        parse.append(t1 - t0)
+        decode.append(t2 - t1)
+        stats.append(t3 - t2)
+
+    # Best of N: the floor is what the code costs, the rest is noise
+    best = lambda xs: round(min(xs) * 1000, 1)
+    return {"parse_ms": best(parse), "from_dict_ms": best(decode), "stats_ms": best(stats),
+            "total_ms": best(np.add(np.add(parse, decode), stats))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start cost of loading saved batches")
+    parser.add_argument("--batches", type=int, default=10_000)
+    parser.add_argument("--samples", type=int, default=20, help="Samples per batch")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", default=None, help="Also write the report as JSON")
+    args = parser.parse_args()
+
+    print(f"[BENCH] Building {args.batches} batches x {args.samples} samples...")
+    corpus = synthetic_corpus(args.batches, args.samples)
+    runs = {
+        "computed_stats": time_decode(corpus, args.repeat),
+        "no_stats": time_decode(strip_stats(corpus), args.repeat),
+    }
+
+    header = f"{'CORPUS':<16} {'PARSEms':>9} {'DECODEms':>9} {'STATSms':>9} {'TOTALms':>9} {'us/BATCH':>9}"
+    print(header)
+    print("─" * len(header))
+    for name, r in runs.items():
+        per_batch = r["total_ms"] * 1000 / max(args.batches, 1)
+        print(f"{name:<16} {r['parse_ms']:>9} {r['from_dict_ms']:>9} {r['stats_ms']:>9} "
+              f"{r['total_ms']:>9} {per_batch:>9.1f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(runs, f, indent=2)
+        print(f"[BENCH] Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
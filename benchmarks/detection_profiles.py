@@ -0,0 +1,156 @@
+"""
+Detection profile benchmark.
+Runs every detection profile over a stored image set and reports latency
+against grading accuracy, using the reference profile's grades as ground truth.
+
+    python -m benchmarks.detection_profiles data/results
+    python -m benchmarks.detection_profiles data/results --profiles fast balanced --custom 416:0.3
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from src.detect import PROFILES, DetectionProfile
+from src.models.banana import Banana
+from src.models.inventory import quality_tier
+from src.pipeline import BananaInspectionPipeline
+from src.tracking import iou_matrix
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png"}
+
+
+def detection_tier(det: dict) -> str:
+    """Tier the detection would sell under: inventory grades Banana.quality_index, not quality_score."""
+    banana = Banana(
+        length_cm=det["length_cm"],
+        ripeness=det["ripeness"],
+        confidence=det["confidence"],
+        mean_hsv=tuple(det["mean_hsv"])
+    )
+    return quality_tier(banana.quality_index())
+
+
+def load_images(path: Path, limit: int = None):
+    files = sorted(f for f in path.iterdir() if f.suffix.lower() in IMAGE_SUFFIXES)
+    if limit:
+        files = files[:limit]
+    images = [(f.name, cv2.imread(str(f))) for f in files]
+    return [(name, img) for name, img in images if img is not None]
+
+
+def run_profile(profile: DetectionProfile, images, warmup: int = 2):
+    pipeline = BananaInspectionPipeline(profile=profile)
+
+    for _, img in images[:warmup]:
+        pipeline.process_frame(img)
+
+    latencies, outputs = [], {}
+    for name, img in images:
+        start = time.perf_counter()
+        outputs[name] = pipeline.process_frame(img)
+        latencies.append(time.perf_counter() - start)
+
+    return np.array(latencies) * 1000, outputs
+
+
+def compare(reference: dict, candidate: dict, iou_threshold: float = 0.5) -> dict:
+    """Matches candidate bananas to reference bananas by bbox IoU, per image."""
+    ref_total = cand_total = matched = 0
+    ripeness_agree = tier_agree = 0
+    length_errors = []
+
+    for name, ref in reference.items():
+        cand = candidate.get(name, [])
+        ref_total += len(ref)
+        cand_total += len(cand)
+        if not ref or not cand:
+            continue
+
+        ious = iou_matrix([r["bbox"] for r in ref], [c["bbox"] for c in cand])
+        used = set()
+        for i in range(len(ref)):
+            j = int(np.argmax(ious[i]))
+            if ious[i, j] < iou_threshold or j in used:
+                continue
+            used.add(j)
+            matched += 1
+            r, c = ref[i], cand[j]
+            ripeness_agree += r["ripeness"] == c["ripeness"]
+            tier_agree += detection_tier(r) == detection_tier(c)
+            length_errors.append(abs(r["length_cm"] - c["length_cm"]))
+
+    return {
+        "recall": round(matched / ref_total, 3) if ref_total else 1.0,
+        "precision": round(matched / cand_total, 3) if cand_total else 1.0,
+        "ripeness_agreement": round(ripeness_agree / matched, 3) if matched else None,
+        "tier_agreement": round(tier_agree / matched, 3) if matched else None,
+        "length_mae_cm": round(float(np.mean(length_errors)), 2) if length_errors else None,
+    }
+
+
+def parse_custom(spec: str) -> DetectionProfile:
+    # "imgsz:conf[:iou[:max_det]]", e.g. "416:0.3" or "512:0.25:0.6:40"
+    parts = spec.split(":")
+    values = dict(zip(("imgsz", "conf", "iou", "max_det"), parts))
+    return DetectionProfile(
+        name=f"custom-{spec}",
+        imgsz=int(values["imgsz"]),
+        conf=float(values.get("conf", 0.25)),
+        iou=float(values.get("iou", 0.7)),
+        max_det=int(values.get("max_det", 100)),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency vs accuracy per detection profile")
+    parser.add_argument("images", type=Path, help="Directory of stored captures")
+    parser.add_argument("--profiles", nargs="+", default=list(PROFILES), choices=list(PROFILES))
+    parser.add_argument("--custom", nargs="*", default=[], help="Extra profiles as imgsz:conf[:iou[:max_det]]")
+    parser.add_argument("--reference", default="accurate", choices=list(PROFILES))
+    parser.add_argument("--limit", type=int, default=None, help="Only use the first N images")
+    parser.add_argument("--json", type=Path, default=None, help="Also write the report as JSON")
+    args = parser.parse_args()
+
+    images = load_images(args.images, args.limit)
+    if not images:
+        raise SystemExit(f"❌ No images found in {args.images}")
+
+    profiles = [PROFILES[p] for p in args.profiles] + [parse_custom(c) for c in args.custom]
+    if all(p.name != args.reference for p in profiles):
+        profiles.insert(0, PROFILES[args.reference])
+
+    print(f"[BENCH] {len(images)} images, reference profile: {args.reference}")
+    runs = {p.name: (p, *run_profile(p, images)) for p in profiles}
+    reference = runs[args.reference][2]
+
+    report = []
+    for name, (profile, latencies, outputs) in runs.items():
+        row = {
+            **profile.to_dict(),
+            "p50_ms": round(float(np.percentile(latencies, 50)), 1),
+            "p95_ms": round(float(np.percentile(latencies, 95)), 1),
+            "bananas": sum(len(v) for v in outputs.values()),
+            **compare(reference, outputs),
+        }
+        report.append(row)
+
+    header = f"{'PROFILE':<22} {'IMGSZ':>5} {'CONF':>5} {'P50ms':>7} {'P95ms':>7} {'N':>5} {'RECALL':>7} {'PREC':>6} {'RIPE':>6} {'TIER':>6} {'LEN-MAE':>8}"
+    print(header)
+    print("─" * len(header))
+    for r in sorted(report, key=lambda r: r["p50_ms"]):
+        fmt = lambda v: "-" if v is None else v
+        print(f"{r['name']:<22} {r['imgsz']:>5} {r['conf']:>5} {r['p50_ms']:>7} {r['p95_ms']:>7} "
+              f"{r['bananas']:>5} {r['recall']:>7} {r['precision']:>6} {fmt(r['ripeness_agreement']):>6} "
+              f"{fmt(r['tier_agreement']):>6} {fmt(r['length_mae_cm']):>8}")
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+        print(f"[BENCH] Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
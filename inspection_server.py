@@ -0,0 +1,281 @@
+"""
+Multi-camera inspection server.
+One process serves several packing lines: every camera gets a reader thread,
+and a fixed pool of inference workers (each with its own model copy) takes
+frames from the stations in fair round-robin order. Each station keeps its
+own motion gate, fruit tracker, calibration, capture segments and
+InspectionController batch.
+
+    python inspection_server.py --camera line_a=0 --camera line_b=rtsp://10.0.0.12/stream
+    python inspection_server.py --camera a=belt_a.mp4 --camera b=belt_b.mp4 --workers 2
+"""
+import argparse
+import logging
+import threading
+import time
+from pathlib import Path
+
+import cv2
+
+from src.calibration import CALIBRATION_DIR, load_calibration
+from src.capture_store import CaptureSegmentWriter
+from src.controller.inspection_controller import InspectionController
+from src.detect import BananaDetector
+from src.geometry import PX_TO_CM
+from src.instrumentation import Metrics
+from src.pipeline import BananaInspectionPipeline, InspectionStream
+
+STATS_INTERVAL = 60
+OUTPUT_DIR = Path("data/results")
+
+
+class Station:
+    """One camera / packing line and everything that is private to it."""
+
+    def __init__(self, name: str, source, output_dir: Path = OUTPUT_DIR, banana_type: str = "Cavendish"):
+        self.name = name
+        self.source = source
+        self.is_file = isinstance(source, str) and Path(source).is_file()
+
+        # Each station is measured with its own profile only, never another camera's
+        calibration = None
+        if (CALIBRATION_DIR / f"{name}.json").exists():
+            calibration = load_calibration(name)
+        else:
+            print(f"[SERVER] ⚠️ Station {name}: no {CALIBRATION_DIR / name}.json, "
+                  f"measuring with the uncalibrated px_to_cm ({PX_TO_CM} cm/px)")
+        self.stream = InspectionStream(calibration=calibration)
+        self.controller = InspectionController(banana_type, station=name)
+        self.segments = CaptureSegmentWriter(Path(output_dir) / name)
+
+        # Latest-frame slot, owned by the scheduler
+        self.frame = None
+        self.frame_ts = None
+        self.in_flight = False
+        self.finished = False
+
+        self.frames_read = 0
+        self.frames_dropped = 0
+        self.frames_inspected = 0
+
+    def record(self, ts: int, results: list):
+        """Runs on the worker that holds this station: never concurrently."""
+        for result in results:
+            self.controller.process_detection(result)
+        if results:
+            self.segments.append(ts, None, results)
+            self.segments.flush()
+
+
+class RoundRobinScheduler:
+    """
+    Hands the freshest frame of each station to idle workers, one station
+    after the other. A station is never in flight on two workers at once, so
+    its tracker and controller see frames in order; a busy station's slot is
+    simply overwritten by newer frames (counted as drops).
+    """
+
+    def __init__(self, stations: list):
+        self.stations = stations
+        self._cursor = 0
+        self._cond = threading.Condition()
+        self._stopped = False
+
+    def offer(self, station: Station, frame, ts: int):
+        with self._cond:
+            if station.frame is not None:
+                station.frames_dropped += 1
+            station.frame, station.frame_ts = frame, ts
+            self._cond.notify()
+
+    def finish(self, station: Station):
+        with self._cond:
+            station.finished = True
+            self._cond.notify_all()
+
+    def next(self):
+        """Blocks until a station has a frame; returns (station, ts, frame), or None when done."""
+        with self._cond:
+            while True:
+                if self._stopped:
+                    return None
+                n = len(self.stations)
+                for i in range(n):
+                    station = self.stations[(self._cursor + i) % n]
+                    if station.frame is not None and not station.in_flight:
+                        self._cursor = (self._cursor + i + 1) % n
+                        frame, ts = station.frame, station.frame_ts
+                        station.frame = None
+                        station.in_flight = True
+                        return station, ts, frame
+                if all(s.finished and s.frame is None for s in self.stations):
+                    return None
+                self._cond.wait(timeout=0.5)
+
+    def release(self, station: Station):
+        with self._cond:
+            station.in_flight = False
+            station.frames_inspected += 1
+            self._cond.notify_all()
+
+    def idle(self) -> bool:
+        with self._cond:
+            return all(s.finished and s.frame is None and not s.in_flight for s in self.stations)
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+
+class InspectionServer:
+    def __init__(self, stations: list, workers: int = 2, profile=None, metrics=None):
+        self.stations = stations
+        self.scheduler = RoundRobinScheduler(stations)
+        self.metrics = metrics
+        self.logger = logging.getLogger("InspectionServer")
+
+        # W model copies for N cameras: workers never share a model between threads
+        self.pipelines = [
+            BananaInspectionPipeline(
+                metrics=metrics,
+                detector=BananaDetector(profile=profile, shared=False, metrics=metrics)
+            )
+            for _ in range(workers)
+        ]
+        self._running = threading.Event()
+        self._threads = []
+
+    # --- LIFECYCLE ---
+
+    def start(self):
+        self._running.set()
+        for station in self.stations:
+            t = threading.Thread(target=self._reader_loop, args=(station,), name=f"reader-{station.name}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        for i, pipeline in enumerate(self.pipelines):
+            t = threading.Thread(target=self._worker_loop, args=(pipeline,), name=f"inference-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        print(f"[SERVER] {len(self.stations)} station(s) on {len(self.pipelines)} inference worker(s)")
+        return self
+
+    def stop(self, timeout: float = 10.0):
+        """Stops readers and workers, then reports fruit still being tracked."""
+        self._running.clear()
+        self.scheduler.stop()
+        for t in self._threads:
+            t.join(timeout=timeout)
+        self._threads = []
+
+        for station in self.stations:
+            station.record(int(time.time()), self.pipelines[0].flush_stream(station.stream))
+            station.segments.close()
+            # Unfinished batches resume from here on the next start
+            if len(station.controller.current_batch):
+                station.controller.checkpoint()
+
+        # Periodic exports only happen on the hot path: write the final numbers
+        if self.metrics:
+            self.metrics.export()
+
+    def wait(self):
+        """Blocks until every (file) source is exhausted, or Ctrl+C."""
+        last_stats = time.time()
+        try:
+            while not self.scheduler.idle():
+                time.sleep(0.5)
+                if time.time() - last_stats >= STATS_INTERVAL:
+                    self.print_stats()
+                    last_stats = time.time()
+        except KeyboardInterrupt:
+            print("\n[SERVER] Interrupted")
+
+    # --- STAGES ---
+
+    def _reader_loop(self, station: Station):
+        cap = cv2.VideoCapture(station.source)
+        if not cap.isOpened():
+            print(f"[SERVER] ❌ Station {station.name}: cannot open {station.source}")
+            self.scheduler.finish(station)
+            return
+
+        # Video files stand in for cameras: replay them at their native rate
+        delay = 0.0
+        if station.is_file:
+            fps = cap.get(cv2.CAP_PROP_FPS)
+            delay = 1.0 / fps if fps and fps > 0 else 0.0
+
+        try:
+            while self._running.is_set():
+                start = time.perf_counter()
+                ret, frame = cap.read()
+                if not ret:
+                    print(f"[SERVER] Station {station.name}: source ended")
+                    break
+                station.frames_read += 1
+                self.scheduler.offer(station, frame, int(time.time()))
+                if delay:
+                    time.sleep(max(0.0, delay - (time.perf_counter() - start)))
+        finally:
+            cap.release()
+            self.scheduler.finish(station)
+
+    def _worker_loop(self, pipeline: BananaInspectionPipeline):
+        while True:
+            job = self.scheduler.next()
+            if job is None:
+                break
+            station, ts, frame = job
+            try:
+                results = pipeline.process_stream_frame(frame, station.stream)
+                station.record(ts, results)
+            except Exception:
+                self.logger.exception(f"[SERVER] Station {station.name}: inspection failed")
+            finally:
+                self.scheduler.release(station)
+
+    def print_stats(self):
+        for s in self.stations:
+            print(f"[STATS] {s.name:<10} read={s.frames_read} inspected={s.frames_inspected} "
+                  f"dropped={s.frames_dropped} gated_in={s.stream.frames_inspected} "
+                  f"bananas={s.stream.bananas_counted} batch={len(s.controller.current_batch)}")
+
+
+def parse_camera(spec: str):
+    """NAME=SOURCE; SOURCE is a device index, an RTSP/HTTP URL or a video file."""
+    name, sep, source = spec.partition("=")
+    if not sep or not name or not source:
+        raise argparse.ArgumentTypeError(f"Expected NAME=SOURCE, got '{spec}'")
+    return name, int(source) if source.isdigit() else source
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-camera banana inspection server")
+    parser.add_argument("--camera", type=parse_camera, action="append", required=True,
+                        help="NAME=SOURCE, repeat per station (calibration: data/calibration/NAME.json)")
+    parser.add_argument("--workers", type=int, default=2, help="Inference workers (model copies)")
+    parser.add_argument("--profile", default=None, help="Detection profile (accurate, balanced, fast)")
+    parser.add_argument("--output", type=Path, default=OUTPUT_DIR, help="Capture segments go to OUTPUT/<station>/")
+    parser.add_argument("--metrics", type=Path, default=None, help="Write per-stage timings to this file")
+    parser.add_argument("--verbose", action="store_true", help="Log per-frame pipeline output")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format="%(message)s")
+
+    names = [name for name, _ in args.camera]
+    if len(set(names)) != len(names):
+        raise SystemExit("❌ Station names must be unique")
+
+    stations = [Station(name, source, args.output) for name, source in args.camera]
+    metrics = Metrics(args.metrics) if args.metrics else None
+
+    server = InspectionServer(stations, workers=max(1, args.workers), profile=args.profile, metrics=metrics).start()
+    server.wait()
+    server.stop()
+    server.print_stats()
+
+
+if __name__ == "__main__":
+    main()
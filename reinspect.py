@@ -0,0 +1,207 @@
+"""
+Offline bulk re-inspection.
+Re-grades archived captures (a directory of JPEGs such as the
+banana_sample_*.jpg files run.py saves, or an MP4 file) on a process pool
+without a camera, streaming one JSON line per frame.
+
+With --regrade, stored captures (capture segments / JSON with RLE masks) are
+re-measured from their masks instead: no images, no YOLO.
+
+    python reinspect.py data/results --out data/regraded.jsonl --px-to-cm 0.047
+    python reinspect.py belt_recording.mp4 --every 5 --workers 4
+    python reinspect.py data/results --regrade --station belt_a
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import cv2
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png"}
+CAPTURE_TS = re.compile(r"banana_sample_(\d+)")
+
+# One pipeline per worker process, built once by the pool initializer
+_pipeline = None
+
+
+def _init_worker(px_to_cm, station, log_level):
+    global _pipeline
+    import src.geometry as geometry
+    from src.pipeline import BananaInspectionPipeline
+
+    # Per-frame pipeline logging from N workers is noise (and costs time)
+    logging.basicConfig(level=log_level, format="%(message)s")
+
+    if px_to_cm is not None:
+        geometry.PX_TO_CM = px_to_cm
+    _pipeline = BananaInspectionPipeline(calibration=station)
+
+
+def _inspect_chunk(chunk):
+    """Worker entry: chunk is a list of (source, image_path_or_frame)."""
+    sources, frames = [], []
+    for source, item in chunk:
+        frame = cv2.imread(item) if isinstance(item, str) else item
+        if frame is None:
+            print(f"[REINSPECT] ❌ Unreadable image: {source}")
+            continue
+        sources.append(source)
+        frames.append(frame)
+
+    if not frames:
+        return []
+
+    all_results = _pipeline.process_frames(frames, batch_size=len(frames))
+    return list(zip(sources, all_results))
+
+
+def iter_directory(path: Path):
+    for file in sorted(path.iterdir()):
+        if file.suffix.lower() in IMAGE_SUFFIXES:
+            yield file.name, str(file)
+
+
+def iter_video(path: Path, every: int):
+    cap = cv2.VideoCapture(str(path))
+    if not cap.isOpened():
+        raise RuntimeError(f"Cannot open video: {path}")
+    index = 0
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if index % every == 0:
+                yield f"{path.name}#{index}", frame
+            index += 1
+    finally:
+        cap.release()
+
+
+def _chunks(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _record(source: str, results: list) -> dict:
+    match = CAPTURE_TS.search(source)
+    return {
+        "source": source,
+        "timestamp": int(match.group(1)) if match else None,
+        "detections": results,
+        "status": "OK" if results else "NO_VALID_DETECTION"
+    }
+
+
+def reinspect(input_path: Path, out_path: Path, workers: int, chunk_size: int,
+              every: int = 1, px_to_cm: float = None, station: str = None,
+              log_level: int = logging.WARNING) -> int:
+    if input_path.is_dir():
+        items = iter_directory(input_path)
+    else:
+        items = iter_video(input_path, every)
+
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    written = 0
+    start = time.time()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(px_to_cm, station, log_level)) as pool, open(out_path, "w") as out:
+        # Bounded in-flight window: video frames are never all held in memory
+        in_flight = deque()
+
+        def drain(limit):
+            nonlocal written
+            while len(in_flight) > limit:
+                for source, results in in_flight.popleft().result():
+                    out.write(json.dumps(_record(source, results)) + "\n")
+                    written += 1
+
+        for chunk in _chunks(items, chunk_size):
+            in_flight.append(pool.submit(_inspect_chunk, chunk))
+            drain(workers * 2)
+        drain(0)
+
+    elapsed = time.time() - start
+    print(f"[REINSPECT] ✅ {written} frames -> {out_path} in {elapsed:.1f}s")
+    return written
+
+
+def regrade(input_path: Path, out_path: Path, px_to_cm: float = None, station: str = None) -> int:
+    """Re-grades stored detections from their RLE masks (single process: no inference)."""
+    from src.calibration import load_calibration
+    from src.capture_store import CaptureSegmentReader, iter_capture_dir
+    from src.pipeline import regrade_detection
+
+    calibration = load_calibration(station) if station else None
+
+    if input_path.is_dir():
+        captures = iter_capture_dir(input_path, masks=True)
+    else:
+        reader = CaptureSegmentReader(input_path)
+        captures = ((f"{input_path.name}#{i}", c) for i, c in enumerate(reader.iter_captures(masks=True)))
+
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    written = skipped = 0
+    start = time.time()
+
+    with open(out_path, "w") as out:
+        for source, capture in captures:
+            results = []
+            for det in capture.get("detections", []):
+                regraded = regrade_detection(det, calibration, px_to_cm)
+                if regraded is None:
+                    skipped += 1
+                    continue
+                results.append(regraded)
+            record = _record(source, results)
+            record["timestamp"] = capture.get("timestamp", record["timestamp"])
+            out.write(json.dumps(record) + "\n")
+            written += 1
+
+    elapsed = time.time() - start
+    print(f"[REINSPECT] ✅ Re-graded {written} captures -> {out_path} in {elapsed:.1f}s "
+          f"({skipped} detections without a usable mask)")
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless bulk re-inspection of archived captures")
+    parser.add_argument("input", type=Path, help="Directory of JPEG captures or a video file")
+    parser.add_argument("--out", type=Path, default=Path("data/reinspection.jsonl"))
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1))
+    parser.add_argument("--chunk", type=int, default=4, help="Frames per batched forward pass")
+    parser.add_argument("--every", type=int, default=1, help="Video only: inspect every Nth frame")
+    parser.add_argument("--px-to-cm", type=float, default=None, help="Override geometry.PX_TO_CM")
+    parser.add_argument("--station", default=None, help="Calibration profile to grade with")
+    parser.add_argument("--verbose", action="store_true", help="Log per-frame pipeline output")
+    parser.add_argument("--regrade", action="store_true",
+                        help="Re-grade stored captures from their RLE masks (no YOLO)")
+    args = parser.parse_args()
+
+    if not args.input.exists():
+        raise SystemExit(f"❌ Input not found: {args.input}")
+
+    if args.regrade:
+        regrade(args.input, args.out, args.px_to_cm, args.station)
+        return
+
+    log_level = logging.INFO if args.verbose else logging.WARNING
+    reinspect(args.input, args.out, args.workers, args.chunk, args.every,
+              args.px_to_cm, args.station, log_level)
+
+
+if __name__ == "__main__":
+    main()
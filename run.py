@@ -1,73 +1,89 @@
+import argparse
+import logging
 import cv2
-import json
 import time
 from pathlib import Path
 from src.pipeline import BananaInspectionPipeline
+from src.capture_pipeline import AsyncInspectionPipeline
+from src.instrumentation import Metrics
 
 CAPTURE_INTERVAL = 15
 COUNTDOWN_SECONDS = 3
+STATS_INTERVAL = 60
 
 BASE_DIR = Path(__file__).resolve().parent
 OUTPUT_DIR = BASE_DIR / "data" / "results"
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
-pipeline = BananaInspectionPipeline()
-cap = cv2.VideoCapture(0)
+parser = argparse.ArgumentParser(description="Live banana inspection station")
+parser.add_argument("--stream", action="store_true",
+                    help="Inspect every frame (motion-gated, tracked) instead of every CAPTURE_INTERVAL")
+parser.add_argument("--station", default=None,
+                    help="Calibration profile name (data/calibration/<station>.json)")
+parser.add_argument("--quiet", action="store_true", help="Only log warnings from the pipeline")
+parser.add_argument("--metrics", type=Path, default=None, help="Write per-stage timings to this file")
+parser.add_argument("--metrics-format", choices=["json", "prometheus"], default="json")
+parser.add_argument("--capture-format", choices=["segment", "json"], default="segment",
+                    help="Append captures to .seg files (masks + crops) or write legacy JSON/JPEG pairs")
+args = parser.parse_args()
 
-if not cap.isOpened():
-    raise RuntimeError("Camera not accessible")
+logging.basicConfig(level=logging.WARNING if args.quiet else logging.INFO, format="%(message)s")
 
-print("Press 'q' to quit")
-
-last_capture_time = time.time()
-
-while True:
-    ret, frame = cap.read()
-    if not ret:
-        break
-
-    now = time.time()
-    time_to_next = CAPTURE_INTERVAL - (now - last_capture_time)
-    display = frame.copy()
-
-    if 0 < time_to_next <= COUNTDOWN_SECONDS:
-        cv2.putText(
-            display,
-            f"CAPTURING IN {int(time_to_next) + 1}",
-            (50, 80),
-            cv2.FONT_HERSHEY_SIMPLEX,
-            2,
-            (0, 0, 255),
-            4
-        )
-
-    if time_to_next <= 0:
-        results = pipeline.process_frame(frame)
-        ts = int(time.time())
-
-        out_file = OUTPUT_DIR / f"banana_sample_{ts}.json"
+metrics = Metrics(args.metrics, args.metrics_format) if args.metrics else None
+pipeline = BananaInspectionPipeline(metrics=metrics, calibration=args.station)
 
-        payload = {
-            "timestamp": ts,
-            "detections": results,
-            "status": "OK" if results else "NO_VALID_DETECTION"
-        }
+# Capture, inference and disk writes each run on their own thread,
+# so the preview below stays at camera FPS.
+runner = AsyncInspectionPipeline(pipeline, source=0, output_dir=OUTPUT_DIR, stream=args.stream,
+                                 capture_format=args.capture_format).start()
 
-        with open(out_file, "w") as f:
-            json.dump(payload, f, indent=2)
-
-        cv2.imwrite(str(OUTPUT_DIR / f"banana_sample_{ts}.jpg"), frame)
-
-        print(f"[SAVE] Wrote {out_file.name}")
-        print(f"[SAVE] Wrote banana_sample_{ts}.jpg")
-
-        last_capture_time = now
-
-    cv2.imshow("Banana Inspection", display)
-
-    if cv2.waitKey(1) & 0xFF == ord('q'):
-        break
+print("Press 'q' to quit")
 
-cap.release()
-cv2.destroyAllWindows()
-    
\ No newline at end of file
+last_capture_time = time.time()
+last_stats_time = last_capture_time
+
+try:
+    while True:
+        frame = runner.latest_frame()
+        if frame is None:
+            break
+
+        now = time.time()
+        time_to_next = CAPTURE_INTERVAL - (now - last_capture_time)
+        display = frame.copy()
+
+        if args.stream:
+            # The motion gate inside the pipeline decides which frames reach YOLO
+            runner.submit(frame, int(now))
+        elif 0 < time_to_next <= COUNTDOWN_SECONDS:
+            cv2.putText(
+                display,
+                f"CAPTURING IN {int(time_to_next) + 1}",
+                (50, 80),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                2,
+                (0, 0, 255),
+                4
+            )
+
+        if not args.stream and time_to_next <= 0:
+            runner.submit(frame, int(now))
+            print(f"[CAPTURE] Queued capture {int(now)} for inspection")
+            last_capture_time = now
+
+        if now - last_stats_time >= STATS_INTERVAL:
+            for stage, s in runner.stats().items():
+                print(f"[STATS] {stage:<9} depth={s['queue_depth']} done={s['processed']} "
+                      f"dropped={s['dropped']} avg={s['avg_ms']}ms max={s['max_ms']}ms")
+            last_stats_time = now
+
+        cv2.imshow("Banana Inspection", display)
+
+        if cv2.waitKey(1) & 0xFF == ord('q'):
+            break
+finally:
+    runner.stop()
+    cv2.destroyAllWindows()
+    # Periodic exports only happen on the hot path: write the final numbers
+    if metrics:
+        metrics.export()
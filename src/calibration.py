@@ -0,0 +1,136 @@
+import json
+import threading
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+CALIBRATION_DIR = Path("data/calibration")
+LUT_STEP = 4  # Point LUT resolution in px; lens distortion is smooth at this scale
+
+# Process-wide cache: station name -> CameraCalibration (tables built once)
+_CALIBRATIONS = {}
+_CALIBRATIONS_LOCK = threading.Lock()
+
+
+class CameraCalibration:
+    """
+    Per-camera calibration profile: intrinsics, lens distortion and a
+    homography from undistorted image pixels to belt-plane centimetres.
+    Lookup tables are precomputed at load, so per-frame work is limited to
+    undistorting and projecting the handful of points a measurement needs.
+    """
+
+    def __init__(self, station: str, image_size, camera_matrix, dist_coeffs, homography):
+        self.station = station
+        self.image_size = (int(image_size[0]), int(image_size[1]))  # (width, height)
+        self.camera_matrix = np.asarray(camera_matrix, dtype=np.float64).reshape(3, 3)
+        self.dist_coeffs = np.asarray(dist_coeffs, dtype=np.float64).reshape(-1)
+        self.homography = np.asarray(homography, dtype=np.float64).reshape(3, 3)
+
+        self._frame_maps = None
+        self._build_point_lut()
+
+    # --- LOOKUP TABLES ---
+
+    def _build_point_lut(self):
+        """Undistorted position of every LUT_STEP-th distorted pixel (bilinear in between)."""
+        w, h = self.image_size
+        gx = np.arange(0, w + LUT_STEP, LUT_STEP, dtype=np.float32)
+        gy = np.arange(0, h + LUT_STEP, LUT_STEP, dtype=np.float32)
+        grid = np.stack(np.meshgrid(gx, gy), axis=-1).reshape(-1, 1, 2)
+
+        undistorted = cv2.undistortPoints(grid, self.camera_matrix, self.dist_coeffs, P=self.camera_matrix)
+        self._lut = undistorted.reshape(len(gy), len(gx), 2)
+
+    def frame_maps(self):
+        """cv2.initUndistortRectifyMap tables for whole-frame undistortion (built on first use)."""
+        if self._frame_maps is None:
+            self._frame_maps = cv2.initUndistortRectifyMap(
+                self.camera_matrix, self.dist_coeffs, None, self.camera_matrix,
+                self.image_size, cv2.CV_16SC2
+            )
+        return self._frame_maps
+
+    # --- POINT TRANSFORMS ---
+
+    def undistort_points(self, points) -> np.ndarray:
+        """(N, 2) distorted pixel coordinates -> (N, 2) undistorted pixel coordinates."""
+        pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        gh, gw = self._lut.shape[:2]
+
+        fx = np.clip(pts[:, 0] / LUT_STEP, 0, gw - 1.001)
+        fy = np.clip(pts[:, 1] / LUT_STEP, 0, gh - 1.001)
+        x0, y0 = fx.astype(np.intp), fy.astype(np.intp)
+        ax, ay = (fx - x0)[:, None], (fy - y0)[:, None]
+
+        lut = self._lut
+        top = lut[y0, x0] * (1 - ax) + lut[y0, x0 + 1] * ax
+        bottom = lut[y0 + 1, x0] * (1 - ax) + lut[y0 + 1, x0 + 1] * ax
+        return top * (1 - ay) + bottom * ay
+
+    def to_plane(self, points) -> np.ndarray:
+        """(N, 2) distorted frame pixels -> (N, 2) belt-plane coordinates in cm."""
+        undistorted = self.undistort_points(points).reshape(-1, 1, 2)
+        return cv2.perspectiveTransform(undistorted, self.homography).reshape(-1, 2)
+
+    def undistort_frame(self, frame):
+        """Full-frame undistortion, for previews and calibration checks only."""
+        map1, map2 = self.frame_maps()
+        return cv2.remap(frame, map1, map2, cv2.INTER_LINEAR)
+
+    # --- SERIALIZATION ---
+
+    def to_dict(self) -> dict:
+        return {
+            "station": self.station,
+            "image_size": list(self.image_size),
+            "camera_matrix": self.camera_matrix.tolist(),
+            "dist_coeffs": self.dist_coeffs.tolist(),
+            "homography": self.homography.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'CameraCalibration':
+        return cls(
+            station=data["station"],
+            image_size=data["image_size"],
+            camera_matrix=data["camera_matrix"],
+            dist_coeffs=data.get("dist_coeffs", [0, 0, 0, 0, 0]),
+            homography=data.get("homography", np.eye(3)),
+        )
+
+    def save(self, directory: Path = CALIBRATION_DIR) -> Path:
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{self.station}.json"
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return path
+
+
+def fit_belt_homography(calibration: CameraCalibration, image_points, plane_points_cm) -> np.ndarray:
+    """
+    Homography from undistorted pixels to belt-plane cm, from >= 4 marked points
+    (e.g. the corners of a ruler or calibration sheet lying on the belt).
+    """
+    undistorted = calibration.undistort_points(image_points).astype(np.float32)
+    homography, _ = cv2.findHomography(undistorted, np.asarray(plane_points_cm, dtype=np.float32))
+    if homography is None:
+        raise ValueError("Could not fit a belt homography from the given points")
+    return homography
+
+
+def load_calibration(station: str, directory: Path = CALIBRATION_DIR) -> CameraCalibration:
+    """Loads data/calibration/<station>.json once per process."""
+    with _CALIBRATIONS_LOCK:
+        calibration = _CALIBRATIONS.get(station)
+        if calibration is None:
+            path = Path(directory) / f"{station}.json"
+            if not path.exists():
+                raise FileNotFoundError(f"No calibration profile for station '{station}' at {path}")
+            with open(path, "r") as f:
+                calibration = CameraCalibration.from_dict(json.load(f))
+            _CALIBRATIONS[station] = calibration
+            print(f"[CALIBRATION] Loaded profile for station '{station}'")
+        return calibration
@@ -0,0 +1,302 @@
+import json
+import queue
+import threading
+import time
+from pathlib import Path
+
+import cv2
+
+from src.capture_store import CaptureSegmentWriter
+
+
+class StageStats:
+    """Thread-safe counters for one pipeline stage."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.processed = 0
+        self.dropped = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, count: int = 1):
+        with self._lock:
+            self.processed += count
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+
+    def record_drop(self):
+        with self._lock:
+            self.dropped += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            avg = self.total_latency / self.processed if self.processed else 0.0
+            return {
+                "processed": self.processed,
+                "dropped": self.dropped,
+                "avg_ms": round(avg * 1000, 1),
+                "max_ms": round(self.max_latency * 1000, 1),
+            }
+
+
+class BoundedQueue:
+    """
+    Bounded hand-off between stages.
+    policy="drop_oldest": a full queue discards its oldest item (freshest frame wins).
+    policy="block": a full queue blocks the producer (backpressure, nothing lost).
+    """
+
+    def __init__(self, maxsize: int, policy: str = "drop_oldest", stats: StageStats = None):
+        if policy not in ("drop_oldest", "block"):
+            raise ValueError(f"Unknown queue policy: {policy}")
+        self._queue = queue.Queue(maxsize=maxsize)
+        self.policy = policy
+        self.stats = stats
+
+    def put(self, item, timeout: float = None) -> bool:
+        if self.policy == "block":
+            try:
+                self._queue.put(item, timeout=timeout)
+                return True
+            except queue.Full:
+                return False
+
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return True
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    if self.stats:
+                        self.stats.record_drop()
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout: float = None):
+        """Returns the next item, or None on timeout."""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def get_nowait(self):
+        """Returns the next item, or None if the queue is empty."""
+        try:
+            return self._queue.get_nowait()
+        except queue.Empty:
+            return None
+
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+
+_STOP = object()
+
+
+class AsyncInspectionPipeline:
+    """
+    Staged capture -> inference -> persist pipeline.
+    A camera reader thread keeps the live view at camera FPS while an inference
+    worker and a writer worker run behind bounded queues.
+    With stream=True every submitted frame goes through the pipeline's motion-gated
+    stream mode; each fruit is written once, as a fused record, when its track
+    ends (no JPEG: by then the fruit has usually left the frame).
+    capture_format="segment" appends captures to captures_<ts>.seg files
+    (src.capture_store); "json" keeps the legacy banana_sample_<ts>.json/.jpg pairs.
+    """
+
+    def __init__(self, pipeline, source=0, output_dir: Path = Path("data/results"),
+                 inference_queue_size: int = 2, writer_queue_size: int = 16,
+                 write_batch_size: int = 8, stream: bool = False,
+                 capture_format: str = "segment"):
+        if capture_format not in ("segment", "json"):
+            raise ValueError(f"Unknown capture format: {capture_format}")
+        self.pipeline = pipeline
+        self.stream = stream
+        self.capture_format = capture_format
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.write_batch_size = write_batch_size
+        self.segments = CaptureSegmentWriter(self.output_dir) if capture_format == "segment" else None
+
+        self.cap = cv2.VideoCapture(source)
+        if not self.cap.isOpened():
+            raise RuntimeError("Camera not accessible")
+
+        self.stage_stats = {
+            name: StageStats(name) for name in ("capture", "inference", "writer")
+        }
+
+        # Preview only ever needs the newest frame
+        self.frames = BoundedQueue(1, "drop_oldest", self.stage_stats["capture"])
+        # Stale captures are worth less than fresh ones: drop the oldest
+        self.inference_queue = BoundedQueue(inference_queue_size, "drop_oldest",
+                                            self.stage_stats["inference"])
+        # Results must never be lost: block the inference worker instead
+        self.writer_queue = BoundedQueue(writer_queue_size, "block",
+                                         self.stage_stats["writer"])
+
+        self._running = threading.Event()
+        self._threads = []
+        self._last_ts = None
+        self._same_ts_count = 0
+
+    # --- LIFECYCLE ---
+
+    def start(self):
+        self._running.set()
+        for target, name in (
+            (self._reader_loop, "camera-reader"),
+            (self._inference_loop, "inference-worker"),
+            (self._writer_loop, "writer-worker"),
+        ):
+            t = threading.Thread(target=target, name=name, daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def stop(self, timeout: float = 10.0):
+        """Stops capture, flushes in-flight results to disk, then releases the camera."""
+        self._running.clear()
+        self.inference_queue.put(_STOP)
+        for t in self._threads:
+            t.join(timeout=timeout)
+        self._threads = []
+        self.cap.release()
+
+    # --- PRODUCER API ---
+
+    def latest_frame(self, timeout: float = 1.0):
+        """Newest camera frame for the live view, or None if the camera stalled."""
+        return self.frames.get(timeout=timeout)
+
+    def submit(self, frame, ts: int = None):
+        """Queues a frame for inspection without waiting for it."""
+        self.inference_queue.put((ts or int(time.time()), frame))
+
+    def stats(self) -> dict:
+        depths = {
+            "capture": self.frames.depth(),
+            "inference": self.inference_queue.depth(),
+            "writer": self.writer_queue.depth(),
+        }
+        return {
+            name: {"queue_depth": depths[name], **s.snapshot()}
+            for name, s in self.stage_stats.items()
+        }
+
+    # --- STAGES ---
+
+    def _reader_loop(self):
+        stats = self.stage_stats["capture"]
+        while self._running.is_set():
+            start = time.perf_counter()
+            ret, frame = self.cap.read()
+            if not ret:
+                print("[CAPTURE] ❌ Camera read failed, stopping reader")
+                self._running.clear()
+                break
+            stats.record(time.perf_counter() - start)
+            self.frames.put(frame)
+
+    def _inference_loop(self):
+        stats = self.stage_stats["inference"]
+        while True:
+            item = self.inference_queue.get(timeout=0.5)
+            if item is None:
+                continue
+            if item is _STOP:
+                break
+
+            ts, frame = item
+            start = time.perf_counter()
+            if self.stream:
+                results = self.pipeline.process_stream_frame(frame)
+            else:
+                results = self.pipeline.process_frame(frame)
+            stats.record(time.perf_counter() - start)
+
+            if self.stream:
+                if not results:
+                    continue
+                frame = None
+
+            # Backpressure: wait for the writer rather than dropping results
+            self.writer_queue.put((ts, frame, results))
+
+        if self.stream:
+            # Fruit still in view at shutdown is reported too
+            results = self.pipeline.flush_stream()
+            if results:
+                self.writer_queue.put((int(time.time()), None, results))
+
+        self.writer_queue.put(_STOP)
+
+    def _writer_loop(self):
+        stats = self.stage_stats["writer"]
+        stopping = False
+        while not stopping:
+            item = self.writer_queue.get(timeout=0.5)
+            if item is None:
+                continue
+
+            # Drain whatever else is ready so writes go out in one burst
+            pending = []
+            while item is not None:
+                if item is _STOP:
+                    stopping = True
+                    break
+                pending.append(item)
+                if len(pending) >= self.write_batch_size:
+                    break
+                item = self.writer_queue.get_nowait()
+
+            if pending:
+                start = time.perf_counter()
+                if self.segments:
+                    self._append_segments(pending)
+                else:
+                    self._write_captures(pending)
+                stats.record(time.perf_counter() - start, count=len(pending))
+
+        if self.segments:
+            # Index footer: the segment becomes randomly accessible
+            self.segments.close()
+
+    def _append_segments(self, pending):
+        for ts, frame, results in pending:
+            self.segments.append(ts, frame, results)
+        self.segments.flush()
+        print(f"[SAVE] Appended {len(pending)} capture(s) to {self.segments.path.name}")
+
+    def _capture_name(self, ts: int) -> str:
+        # Stream mode can save several captures within the same second
+        if ts == self._last_ts:
+            self._same_ts_count += 1
+            return f"banana_sample_{ts}_{self._same_ts_count}"
+        self._last_ts, self._same_ts_count = ts, 0
+        return f"banana_sample_{ts}"
+
+    def _write_captures(self, pending):
+        names = []
+        for ts, frame, results in pending:
+            name = self._capture_name(ts)
+            names.append(name)
+            out_file = self.output_dir / f"{name}.json"
+
+            payload = {
+                "timestamp": ts,
+                "detections": results,
+                "status": "OK" if results else "NO_VALID_DETECTION"
+            }
+
+            with open(out_file, "w") as f:
+                json.dump(payload, f, separators=(",", ":"))
+
+            if frame is not None:
+                cv2.imwrite(str(self.output_dir / f"{name}.jpg"), frame)
+
+        print(f"[SAVE] Wrote {len(pending)} capture(s): " + ", ".join(names))
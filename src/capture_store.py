@@ -0,0 +1,302 @@
+"""
+Append-only capture segments.
+
+One segment file replaces thousands of banana_sample_<ts>.json/.jpg pairs:
+
+    header    MAGIC, version, created timestamp
+    record*   one per capture: capture header, then per detection a packed
+              DETECTION struct followed by its RLE mask blob and JPEG crop
+    footer    (offset, timestamp) per record, then TRAILER
+
+The footer is only written when a segment is closed; a segment left open by a
+crash is still readable by scanning the records from the header.
+"""
+import json
+import mmap
+import struct
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from src import rle
+
+MAGIC = b"BNSEG"
+VERSION = 1
+SEGMENT_SUFFIX = ".seg"
+MAX_CAPTURES_PER_SEGMENT = 1000
+CROP_JPEG_QUALITY = 90
+
+HEADER = struct.Struct("<5sBxxq")        # magic, version, created_ts
+CAPTURE = struct.Struct("<IqBH")         # record length, timestamp, status, n detections
+DETECTION = struct.Struct(
+    "<4f"    # bbox (x1, y1, x2, y2)
+    "4f"     # confidence, length_cm, curvature, max_width_cm
+    "3f"     # mean_hsv
+    "2f"     # quality_score, dark_fraction
+    "HBB"    # shelf_life_days, ripeness code, mask codec
+    "3B3B"   # sat_p, val_p
+    "18e"    # hue_hist (float16 fractions)
+    "iH"     # track_id (-1 = none), frames
+    "2i"     # mask offset (x0, y0)
+    "II"     # mask blob length, crop blob length
+)
+INDEX_ENTRY = struct.Struct("<Qq")       # record offset, timestamp
+TRAILER = struct.Struct("<QI4s")         # index offset, record count, magic
+TRAILER_MAGIC = b"BIDX"
+
+RIPENESS_CODES = ("unknown", "unripe", "mid-ripe", "ripe")
+HUE_BINS = 18
+
+MASK_NONE = 0
+MASK_PNG = 1   # Early segments
+MASK_RLE = 2   # MASK_SIZE + src.rle counts string
+MASK_SIZE = struct.Struct("<HH")
+
+
+def _encode_mask(mask):
+    """mask: an src.rle dict (as in pipeline results) or a bool crop array."""
+    if mask is None:
+        return MASK_NONE, b""
+    if not isinstance(mask, dict):
+        mask = rle.encode(mask)
+    h, w = mask["size"]
+    return MASK_RLE, MASK_SIZE.pack(h, w) + mask["counts"].encode("ascii")
+
+
+def _decode_mask(codec: int, blob, offset) -> dict:
+    """Stored mask -> src.rle dict placed at offset."""
+    if codec == MASK_NONE or not len(blob):
+        return None
+    if codec == MASK_PNG:
+        mask = cv2.imdecode(np.frombuffer(blob, dtype=np.uint8), cv2.IMREAD_GRAYSCALE) > 0
+        return rle.encode(mask, offset)
+    h, w = MASK_SIZE.unpack_from(blob, 0)
+    return {"size": [h, w], "counts": bytes(blob[MASK_SIZE.size:]).decode("ascii"), "offset": list(offset)}
+
+
+def _encode_crop(frame, bbox) -> bytes:
+    if frame is None:
+        return b""
+    h, w = frame.shape[:2]
+    x1, y1 = max(int(bbox[0]), 0), max(int(bbox[1]), 0)
+    x2, y2 = min(int(np.ceil(bbox[2])), w), min(int(np.ceil(bbox[3])), h)
+    if x2 <= x1 or y2 <= y1:
+        return b""
+    ok, buf = cv2.imencode(".jpg", frame[y1:y2, x1:x2], [cv2.IMWRITE_JPEG_QUALITY, CROP_JPEG_QUALITY])
+    return buf.tobytes() if ok else b""
+
+
+def _pack_detection(det: dict, frame) -> bytes:
+    mask = det.get("mask")
+    codec, mask_blob = _encode_mask(mask)
+    x0, y0 = rle.offset(mask) if isinstance(mask, dict) else (0, 0)
+    crop_blob = _encode_crop(frame, det["bbox"])
+
+    hue_hist = list(det.get("hue_hist") or [0.0] * HUE_BINS)
+    sat_p = det.get("sat_p") or (0, 0, 0)
+    val_p = det.get("val_p") or (0, 0, 0)
+    ripeness = det.get("ripeness", "unknown")
+    track_id = det.get("track_id")
+
+    packed = DETECTION.pack(
+        *det["bbox"],
+        det["confidence"], det["length_cm"], det.get("curvature", 0.0), det.get("max_width_cm", 0.0),
+        *det.get("mean_hsv", (0.0, 0.0, 0.0)),
+        det.get("quality_score", 0.0), det.get("dark_fraction", 0.0),
+        det.get("shelf_life_days", 0),
+        RIPENESS_CODES.index(ripeness) if ripeness in RIPENESS_CODES else 0,
+        codec,
+        *sat_p, *val_p,
+        *hue_hist,
+        -1 if track_id is None else track_id, det.get("frames", 1),
+        x0, y0,
+        len(mask_blob), len(crop_blob),
+    )
+    return packed + mask_blob + crop_blob
+
+
+class CaptureSegmentWriter:
+    """
+    Appends captures to data/results/captures_<ts>.seg, rolling over to a new
+    segment every max_captures. Not thread-safe: owned by the writer stage.
+    """
+
+    def __init__(self, output_dir: Path, max_captures: int = MAX_CAPTURES_PER_SEGMENT):
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.max_captures = max_captures
+        self._file = None
+        self._index = []
+        self.path = None
+
+    def _open(self, ts: int):
+        self.path = self.output_dir / f"captures_{ts}{SEGMENT_SUFFIX}"
+        suffix = 0
+        while self.path.exists():
+            suffix += 1
+            self.path = self.output_dir / f"captures_{ts}_{suffix}{SEGMENT_SUFFIX}"
+        self._file = open(self.path, "wb")
+        self._file.write(HEADER.pack(MAGIC, VERSION, int(time.time())))
+        self._index = []
+
+    def append(self, ts: int, frame, results: list) -> int:
+        """Writes one capture; frame (optional) is only used for the JPEG crops."""
+        if self._file is None:
+            self._open(ts)
+
+        body = b"".join(_pack_detection(det, frame) for det in results)
+        offset = self._file.tell()
+        self._file.write(CAPTURE.pack(CAPTURE.size + len(body), ts, 1 if results else 0, len(results)))
+        self._file.write(body)
+        self._index.append((offset, ts))
+
+        if len(self._index) >= self.max_captures:
+            self.close()
+        return offset
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self):
+        """Writes the index footer; the next append starts a new segment."""
+        if self._file is None:
+            return
+        index_offset = self._file.tell()
+        self._file.write(b"".join(INDEX_ENTRY.pack(o, ts) for o, ts in self._index))
+        self._file.write(TRAILER.pack(index_offset, len(self._index), TRAILER_MAGIC))
+        self._file.close()
+        self._file = None
+
+
+class CaptureSegmentReader:
+    """
+    Memory-mapped reader for one segment. Captures decode to the same dict
+    shape as the legacy JSON files: {"timestamp", "detections", "status"}.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.created = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Not a capture segment: {self.path}")
+        if version != VERSION:
+            raise ValueError(f"Unsupported capture segment version {version}: {self.path}")
+
+        self._index = self._read_index()
+
+    def _read_index(self) -> list:
+        mm = self._mm
+        if len(mm) >= HEADER.size + TRAILER.size:
+            index_offset, count, magic = TRAILER.unpack_from(mm, len(mm) - TRAILER.size)
+            if magic == TRAILER_MAGIC:
+                return [INDEX_ENTRY.unpack_from(mm, index_offset + i * INDEX_ENTRY.size)
+                        for i in range(count)]
+
+        # No footer (segment still open, or the writer died): scan the records
+        index, offset = [], HEADER.size
+        while offset + CAPTURE.size <= len(mm):
+            length, ts, _, _ = CAPTURE.unpack_from(mm, offset)
+            if length < CAPTURE.size or offset + length > len(mm):
+                break  # Torn final record
+            index.append((offset, ts))
+            offset += length
+        return index
+
+    def __len__(self):
+        return len(self._index)
+
+    def timestamps(self) -> list:
+        return [ts for _, ts in self._index]
+
+    def __getitem__(self, i: int) -> dict:
+        return self._read_capture(self._index[i][0])
+
+    def __iter__(self):
+        for offset, _ in self._index:
+            yield self._read_capture(offset)
+
+    def iter_captures(self, masks: bool = False, crops: bool = False):
+        """Decoded captures; mask and crop blobs are only decoded on request."""
+        for offset, _ in self._index:
+            yield self._read_capture(offset, masks, crops)
+
+    def _read_capture(self, offset: int, masks: bool = False, crops: bool = False) -> dict:
+        mm = self._mm
+        _, ts, status, n = CAPTURE.unpack_from(mm, offset)
+        pos = offset + CAPTURE.size
+
+        detections = []
+        for _ in range(n):
+            v = DETECTION.unpack_from(mm, pos)
+            pos += DETECTION.size
+            bbox, (confidence, length, curvature, width) = v[0:4], v[4:8]
+            mean_hsv, (quality, dark_fraction) = v[8:11], v[11:13]
+            shelf_life, ripeness, codec = v[13:16]
+            sat_p, val_p, hue_hist = v[16:19], v[19:22], v[22:40]
+            track_id, frames, x0, y0, mask_len, crop_len = v[40:46]
+
+            det = {
+                "bbox": [round(x, 1) for x in bbox],
+                "confidence": round(confidence, 3),
+                "length_cm": round(length, 2),
+                "curvature": round(curvature, 4),
+                "max_width_cm": round(width, 2),
+                "ripeness": RIPENESS_CODES[ripeness],
+                "mean_hsv": list(mean_hsv),
+                "hue_hist": [round(x, 3) for x in hue_hist],
+                "sat_p": list(sat_p),
+                "val_p": list(val_p),
+                "dark_fraction": round(dark_fraction, 4),
+                "shelf_life_days": shelf_life,
+                "quality_score": round(quality, 2),
+            }
+            if track_id >= 0:
+                det["track_id"], det["frames"] = track_id, frames
+            if masks:
+                det["mask"] = _decode_mask(codec, mm[pos:pos + mask_len], (x0, y0))
+            pos += mask_len
+            if crops and crop_len:
+                det["crop"] = cv2.imdecode(np.frombuffer(mm[pos:pos + crop_len], dtype=np.uint8),
+                                           cv2.IMREAD_COLOR)
+            pos += crop_len
+            detections.append(det)
+
+        return {
+            "timestamp": ts,
+            "detections": detections,
+            "status": "OK" if status else "NO_VALID_DETECTION",
+        }
+
+    def close(self):
+        self._mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_segments(directory: Path, masks: bool = False, crops: bool = False):
+    """Yields (source, capture) for every capture in every segment under directory."""
+    for path in sorted(Path(directory).glob(f"captures_*{SEGMENT_SUFFIX}")):
+        if path.stat().st_size < HEADER.size:
+            continue  # Created but never written to
+        with CaptureSegmentReader(path) as reader:
+            for i, capture in enumerate(reader.iter_captures(masks, crops)):
+                yield f"{path.name}#{i}", capture
+
+
+def iter_capture_dir(directory: Path, masks: bool = False, crops: bool = False):
+    """Segments first, then any legacy banana_sample_<ts>.json files, as (source, capture)."""
+    directory = Path(directory)
+    yield from iter_segments(directory, masks, crops)
+    for file in sorted(directory.glob("banana_sample_*.json")):
+        with open(file, "r") as f:
+            yield file.name, json.load(f)
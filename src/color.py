@@ -1,23 +1,139 @@
 import cv2
 import numpy as np
 
-def analyze_color(frame, mask):
-    # 1. Validation: Ensure mask is valid and contains data
-    if mask is None or np.sum(mask) == 0:
-        return {"ripeness": "unknown", "hue": 0, "saturation": 0}
-
-    # 2. Convert to HSV once
-    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-    
-    # 3. Extract pixels where mask is true
-    # We use the mask directly as an index to avoid slicing errors
-    pixels = hsv[mask > 0]
-    
-    if len(pixels) == 0:
-        return {"ripeness": "unknown", "hue": 0, "saturation": 0}
-
-    # 4. Calculate Mean Stats
-    mean_hsv = pixels.mean(axis=0)
+# Integer histogram engine settings (OpenCV HSV: H 0-179, S/V 0-255)
+HUE_BINS = 18              # Compact hue histogram: 10 hue units per bin
+PERCENTILES = (10, 50, 90)  # Reported for saturation and value
+DARK_SPOT_V = 70           # Peel pixels darker than this count as dark/brown spots
+
+# Fixed-length feature vector: hue_hist + sat_p + val_p + dark_fraction
+COLOR_FEATURE_LEN = HUE_BINS + 2 * len(PERCENTILES) + 1
+
+_UNKNOWN = {"ripeness": "unknown", "hue": 0, "saturation": 0}
+
+
+def analyze_color(frame, mask, offset=None):
+    """Single-banana entry point; same engine (and dict) as analyze_colors."""
+    if mask is None or not np.any(mask):
+        return dict(_UNKNOWN)
+    offsets = [offset] if offset is not None else None
+    return analyze_colors(frame, [mask], offsets)[0]
+
+
+def analyze_colors(frame, masks, offsets=None):
+    """
+    Frame-level color engine: one HSV conversion for every banana in the frame.
+    Masks may be full-frame or bbox crops placed at `offsets` (x0, y0); with
+    crops only the region covering all of them is converted.
+    Returns the same dicts as analyze_color, one per mask, in input order.
+    """
+    masks = list(masks)
+    if not masks:
+        return []
+    if offsets is None:
+        offsets = [(0, 0)] * len(masks)
+
+    # 1. Region covering every mask (the whole frame for full-frame masks)
+    present = [(m, o) for m, o in zip(masks, offsets) if m is not None and m.size]
+    if present:
+        rx0 = min(o[0] for _, o in present)
+        ry0 = min(o[1] for _, o in present)
+        rx1 = max(o[0] + m.shape[1] for m, o in present)
+        ry1 = max(o[1] + m.shape[0] for m, o in present)
+    else:
+        rx0 = ry0 = rx1 = ry1 = 0
+
+    # 2. Convert to HSV once for that region
+    region = frame[ry0:ry1, rx0:rx1]
+    if region.size:
+        hsv = cv2.cvtColor(region, cv2.COLOR_BGR2HSV).reshape(-1, 3)
+    else:
+        hsv = np.empty((0, 3), dtype=np.uint8)
+    rw = rx1 - rx0
+
+    # 3. Build (label, pixel) membership pairs for all masks.
+    # Pairs (not a single label image) keep overlapping bananas exact.
+    pixel_idx = []
+    labels = []
+    for i, (mask, (x0, y0)) in enumerate(zip(masks, offsets)):
+        if mask is None or not mask.size:
+            continue
+        ys, xs = np.nonzero(mask)
+        pixel_idx.append((ys + (y0 - ry0)) * rw + (xs + (x0 - rx0)))
+        labels.append(np.full(len(ys), i, dtype=np.intp))
+
+    n = len(masks)
+    if pixel_idx:
+        pixel_idx = np.concatenate(pixel_idx)
+        labels = np.concatenate(labels)
+    else:
+        pixel_idx = np.empty(0, dtype=np.intp)
+        labels = np.empty(0, dtype=np.intp)
+
+    # 4. Integer histograms for every banana in one pass: bincount over
+    # (label, channel value) pairs gives an (n, bins) count table per channel
+    pixels = hsv[pixel_idx].astype(np.intp)
+    counts = np.bincount(labels, minlength=n)
+    hue_hist = np.bincount(labels * 180 + pixels[:, 0], minlength=n * 180).reshape(n, 180)
+    sat_hist = np.bincount(labels * 256 + pixels[:, 1], minlength=n * 256).reshape(n, 256)
+    val_hist = np.bincount(labels * 256 + pixels[:, 2], minlength=n * 256).reshape(n, 256)
+
+    # 5. Means (exact, from integer sums), percentiles and dark-spot area
+    safe = np.maximum(counts, 1)
+    mean_hsv = np.stack([
+        hue_hist @ np.arange(180),
+        sat_hist @ np.arange(256),
+        val_hist @ np.arange(256),
+    ], axis=1) / safe[:, None]
+
+    sat_p = _percentiles(sat_hist, counts)
+    val_p = _percentiles(val_hist, counts)
+    dark_fraction = val_hist[:, :DARK_SPOT_V].sum(axis=1) / safe
+    hue_compact = hue_hist.reshape(n, HUE_BINS, 180 // HUE_BINS).sum(axis=2) / safe[:, None]
+
+    results = []
+    for i in range(n):
+        if counts[i] == 0:
+            results.append(dict(_UNKNOWN))
+            continue
+        color = classify_mean_hsv(mean_hsv[i])
+        color.update({
+            "hue_hist": [round(float(x), 3) for x in hue_compact[i]],
+            "sat_p": sat_p[i].tolist(),
+            "val_p": val_p[i].tolist(),
+            "dark_fraction": round(float(dark_fraction[i]), 4),
+        })
+        results.append(color)
+
+    return results
+
+
+def _percentiles(hist, counts):
+    """Per-row percentiles (PERCENTILES) read straight off integer histograms."""
+    cdf = np.cumsum(hist, axis=1)
+    targets = np.outer(counts, PERCENTILES) / 100.0
+    # First bin whose cumulative count reaches the target
+    return (cdf[:, None, :] < targets[:, :, None]).sum(axis=2)
+
+
+def color_features(color: dict) -> np.ndarray:
+    """
+    Fixed-length float32 vector (COLOR_FEATURE_LEN) from an analyze_colors dict,
+    for batch aggregation and shelf-life models that never touch the image.
+    """
+    if "hue_hist" not in color:
+        return np.zeros(COLOR_FEATURE_LEN, dtype=np.float32)
+    return np.concatenate([
+        color["hue_hist"],
+        np.asarray(color["sat_p"]) / 255.0,
+        np.asarray(color["val_p"]) / 255.0,
+        [color["dark_fraction"]],
+    ]).astype(np.float32)
+
+
+def classify_mean_hsv(mean_hsv):
+    """Ripeness from a mean (H, S, V); also used to re-grade fused track colors."""
+    mean_hsv = np.asarray(mean_hsv, dtype=float)
     h = mean_hsv[0] # Hue
     s = mean_hsv[1] # Saturation
 
@@ -37,4 +153,4 @@ def analyze_color(frame, mask):
         "hue": round(float(h), 2), 
         "saturation": round(float(s), 2),
         "mean_hsv": mean_hsv.tolist()
-    }
\ No newline at end of file
+    }
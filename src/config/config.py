@@ -9,6 +9,18 @@ class Config:
     WHATSAPP_FROM = os.getenv("TWILIO_WHATSAPP_FROM")
     WHATSAPP_TO = os.getenv("TWILIO_WHATSAPP_TO")
 
+    # --- Vision ---
+    # "ultralytics" (PyTorch) or "onnx" (ONNX Runtime, see src/onnx_backend.py)
+    DETECTOR_BACKEND = os.getenv("BANANAI_DETECTOR_BACKEND", "ultralytics")
+    # None = backend default (yolov8s-seg.pt / yolov8s-seg.onnx)
+    DETECTOR_WEIGHTS = os.getenv("BANANAI_DETECTOR_WEIGHTS")
+    # Preset from src.detect.PROFILES: "accurate", "balanced" or "fast"
+    DETECTION_PROFILE = os.getenv("BANANAI_DETECTION_PROFILE", "accurate")
+    # Station name of this camera; loads data/calibration/<station>.json if set
+    CAMERA_STATION = os.getenv("BANANAI_CAMERA_STATION")
+    # Comma-separated, in priority order, e.g. "OpenVINOExecutionProvider,CPUExecutionProvider"
+    ONNX_PROVIDERS = os.getenv("BANANAI_ONNX_PROVIDERS", "CPUExecutionProvider")
+
     @staticmethod
     def whatsapp_enabled() -> bool:
         enabled = all([
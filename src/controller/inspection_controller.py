@@ -1,16 +1,58 @@
+import json
+import os
 import time
+from pathlib import Path
 from src.models.banana import Banana
 from src.models.banana_sample import BananaSample
 from src.models.banana_batch import BananaBatch
 from src.repository.batch_repository import BatchRepository
+from src.services.statistics_service import RunningStats
+
+CHECKPOINT_DIR = Path("data/batches/in_progress")
+CHECKPOINT_EVERY = 10  # Samples between in-progress checkpoints
 
 class InspectionController:
-    def __init__(self, banana_type: str = "Cavendish"):
+    def __init__(self, banana_type: str = "Cavendish", station: str = "default",
+                 checkpoint_dir: Path = CHECKPOINT_DIR, checkpoint_every: int = CHECKPOINT_EVERY):
+        self.repo = BatchRepository()
+        self.station = station
+        self.checkpoint_every = checkpoint_every
+        # Checkpoint = small header (batch stats + aggregates), rewritten atomically,
+        # plus an append-only log of the samples; each checkpoint costs O(new samples)
+        self.checkpoint_path = Path(checkpoint_dir) / f"{station}.json"
+        self.sample_log_path = Path(checkpoint_dir) / f"{station}.samples.jsonl"
+
+        # A checkpoint left behind by a crash is picked up where it stopped
+        if not self._resume():
+            self._start_batch(banana_type)
+
+    # --- STREAMING AGGREGATES ---
+
+    def _start_batch(self, banana_type: str):
         self.current_batch = BananaBatch(
             banana_type=banana_type,
             received_date=time.time()
         )
-        self.repo = BatchRepository()
+        # Quality, ripeness and shelf life are aggregated by the batch itself
+        self.length_stats = RunningStats()
+        self.weight_stats = RunningStats()
+        self._logged = 0  # Samples of current_batch already in the sample log
+
+    def _update_aggregates(self, banana: Banana):
+        self.length_stats.push(banana.length_cm)
+        self.weight_stats.push(banana.estimated_weight_g())
+
+    def stats(self) -> dict:
+        """O(1) summary of the in-progress batch."""
+        batch_stats = self.current_batch.stats()
+        return {
+            "samples": batch_stats["samples"],
+            "length": self.length_stats.describe(),
+            "weight": self.weight_stats.describe(),
+            "quality": batch_stats["quality"],
+            "ripeness_counts": batch_stats["ripeness_counts"],
+            "min_shelf_life_days": batch_stats["min_shelf_life_days"],
+        }
 
     def process_detection(self, result_dict: dict):
         """
@@ -26,16 +68,89 @@ class InspectionController:
             confidence=result_dict["confidence"],
             mean_hsv=result_dict["mean_hsv"]
         )
-        
+
         sample = BananaSample(banana, time.time())
-        
+
         # Add to the current working batch
-        self.current_batch.add_sample(sample)
+        self.current_batch.add_sample(sample, result_dict.get("shelf_life_days"))
+        self._update_aggregates(banana)
         print(f"🍌 Sample added. Batch count: {len(self.current_batch)}")
 
+        if len(self.current_batch) - self._logged >= self.checkpoint_every:
+            self.checkpoint()
+
+    # --- CHECKPOINTING ---
+
+    def checkpoint(self):
+        """Appends new samples to the log, then atomically rewrites the header."""
+        self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # 1. Samples since the last checkpoint (a fresh batch starts a fresh log)
+        pending = self.current_batch.samples[self._logged:]
+        with open(self.sample_log_path, "a" if self._logged else "w") as f:
+            f.writelines(json.dumps(s.to_dict()) + "\n" for s in pending)
+            f.flush()
+            os.fsync(f.fileno())
+        logged = self._logged + len(pending)
+
+        # 2. Header: only counts samples that are safely in the log
+        payload = {
+            "station": self.station,
+            "batch": self.current_batch.to_dict(include_samples=False),
+            "samples_logged": logged,
+            "aggregates": {
+                "length": self.length_stats.to_dict(),
+                "weight": self.weight_stats.to_dict(),
+            },
+        }
+        tmp_path = self.checkpoint_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(payload, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.checkpoint_path)
+        self._logged = logged
+
+    def _read_sample_log(self, count: int) -> list:
+        """First count lines of the sample log; anything after is a torn, uncommitted tail."""
+        samples = []
+        with open(self.sample_log_path, "r") as f:
+            for line in f:
+                if len(samples) == count:
+                    break
+                samples.append(json.loads(line))
+        if len(samples) < count:
+            raise ValueError(f"sample log has {len(samples)} of {count} samples")
+        return samples
+
+    def _resume(self) -> bool:
+        if not self.checkpoint_path.exists():
+            return False
+        try:
+            with open(self.checkpoint_path, "r") as f:
+                payload = json.load(f)
+            data = payload["batch"]
+            logged = int(payload.get("samples_logged", 0))
+            if "samples" not in data:
+                data = {**data, "samples": self._read_sample_log(logged) if logged else []}
+            batch = BananaBatch.from_dict(data)
+            aggregates = payload["aggregates"]
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ Ignoring unreadable checkpoint {self.checkpoint_path.name}: {e}")
+            return False
+
+        self._start_batch(batch.banana_type)
+        self.current_batch = batch
+        self.length_stats = RunningStats.from_dict(aggregates["length"])
+        self.weight_stats = RunningStats.from_dict(aggregates["weight"])
+        # Older checkpoints embedded the samples: the next checkpoint starts a log
+        self._logged = logged if "samples" not in payload["batch"] else 0
+        print(f"♻️ Resumed batch {batch.batch_id} ({len(batch)} samples) from checkpoint")
+        return True
+
     def finalize_batch(self, total_weight_kg: float):
         """
-        Called when scanning is done. 
+        Called when scanning is done.
         Assigns the simulated weight and saves to permanent inventory.
         """
         if len(self.current_batch) == 0:
@@ -44,13 +159,15 @@ class InspectionController:
 
         self.current_batch.total_weight_kg = total_weight_kg
         self.current_batch.remaining_weight_kg = total_weight_kg
-        
+
         # Save to filesystem
         self.repo.save_batch(self.current_batch)
         print(f"📦 Batch {self.current_batch.batch_id} finalized and saved.")
-        
+
+        # The batch is safe in inventory: the checkpoint has done its job
+        for path in (self.checkpoint_path, self.sample_log_path):
+            if path.exists():
+                path.unlink()
+
         # Reset for next scan
-        self.current_batch = BananaBatch(
-            banana_type=self.current_batch.banana_type,
-            received_date=time.time()
-        )
\ No newline at end of file
+        self._start_batch(self.current_batch.banana_type)
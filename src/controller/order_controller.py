@@ -106,12 +106,12 @@ class OrderController:
             requested = invoice["weight_kg"]
             
             # 1. Attempt Stock Depletion
-            # Check if Batch has the method (we just added it to BananaBatch)
-            if not batch.reserve_stock(requested):
+            # Goes through the inventory so its recommendation index follows the stock
+            if not self.inventory.reserve_stock(batch, requested):
                 # Check for partial fulfillment if requested > remaining
                 if batch.remaining_weight_kg > 0:
                     actual_weight = batch.remaining_weight_kg
-                    batch.reserve_stock(actual_weight) # Take what's left
+                    self.inventory.reserve_stock(batch, actual_weight) # Take what's left
                     
                     # 2. Recalculate Invoice for Partial Shipment
                     print(f"\n[LOGISTICS] PIVOT: Only {actual_weight}kg available. Adjusting Manifest...")
@@ -1,27 +1,265 @@
-from ultralytics import YOLO
+import threading
+from abc import ABC, abstractmethod
+
+import cv2
+import numpy as np
+
+from src.instrumentation import NULL_METRICS
 
 BANANA_CLASS_ID = 46  # COCO banana
+DEFAULT_WEIGHTS = "yolov8s-seg.pt"
+DEFAULT_BACKEND = "ultralytics"
 
 
-class BananaDetector:
-    def __init__(self):
-        self.model = YOLO("yolov8s-seg.pt")
+class DetectionProfile:
+    """
+    Inference settings pushed into the model call: class filter, input size,
+    confidence/IoU thresholds and a cap on detections per frame.
+    """
 
-    def detect_frame(self, frame):
-        result = self.model(frame, verbose=False)[0]
+    def __init__(self, name: str = "custom", imgsz: int = 640, conf: float = 0.25,
+                 iou: float = 0.7, max_det: int = 100, classes=(BANANA_CLASS_ID,)):
+        self.name = name
+        self.imgsz = int(imgsz)
+        self.conf = float(conf)
+        self.iou = float(iou)
+        self.max_det = int(max_det)
+        self.classes = list(classes)
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "imgsz": self.imgsz,
+            "conf": self.conf,
+            "iou": self.iou,
+            "max_det": self.max_det,
+            "classes": self.classes,
+        }
+
+    def __repr__(self):
+        return f"DetectionProfile({self.name}: imgsz={self.imgsz}, conf={self.conf}, iou={self.iou}, max_det={self.max_det})"
+
+
+# Named presets; pick with BANANAI_DETECTION_PROFILE or benchmarks/detection_profiles.py
+PROFILES = {
+    "accurate": DetectionProfile("accurate", imgsz=640, conf=0.25, iou=0.7, max_det=100),
+    "balanced": DetectionProfile("balanced", imgsz=480, conf=0.30, iou=0.6, max_det=50),
+    "fast": DetectionProfile("fast", imgsz=320, conf=0.35, iou=0.6, max_det=30),
+}
+DEFAULT_PROFILE = PROFILES["accurate"]
+
+
+def get_profile(profile=None) -> DetectionProfile:
+    """Accepts a DetectionProfile, a preset name or None (the default preset)."""
+    if profile is None:
+        return DEFAULT_PROFILE
+    if isinstance(profile, DetectionProfile):
+        return profile
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown detection profile: {profile} (choose from {', '.join(PROFILES)})")
+    return PROFILES[profile]
+
+
+# Process-wide registry: (backend, weights) -> loaded, warmed-up backend
+_BACKENDS = {}
+_BACKENDS_LOCK = threading.Lock()
+
+
+class DetectorBackend(ABC):
+    """
+    Inference runtime behind BananaDetector.
+    detect() takes a list of BGR frames, a DetectionProfile and optional Metrics
+    ("inference" and "masks" stages) and returns one list per frame of
+    {"bbox": [x1, y1, x2, y2], "confidence": float, "mask": crop, "offset": (x0, y0)}.
+    """
+
+    name = None
+
+    @abstractmethod
+    def detect(self, frames, profile: DetectionProfile = DEFAULT_PROFILE, metrics=NULL_METRICS):
+        pass
+
+    def warmup(self):
+        # The first call pays for lazy initialization; do it before real frames
+        self.detect([np.zeros((480, 640, 3), dtype=np.uint8)], DEFAULT_PROFILE)
+
+
+class UltralyticsBackend(DetectorBackend):
+    """PyTorch runtime via ultralytics YOLO."""
+
+    name = "ultralytics"
+
+    def __init__(self, weights: str = DEFAULT_WEIGHTS):
+        # Heavy import (torch + ultralytics) only when this backend is built
+        from ultralytics import YOLO
+        self.model = YOLO(weights)
+
+    def detect(self, frames, profile: DetectionProfile = DEFAULT_PROFILE, metrics=NULL_METRICS):
+        # Class filter, size and thresholds run inside the model, not in Python
+        with metrics.timer("inference"):
+            results = self.model(
+                frames,
+                classes=profile.classes,
+                imgsz=profile.imgsz,
+                conf=profile.conf,
+                iou=profile.iou,
+                max_det=profile.max_det,
+                verbose=False
+            )
+        with metrics.timer("masks"):
+            return [self._extract_bananas(r) for r in results]
+
+    def _extract_bananas(self, result):
         bananas = []
 
         if result.boxes is None or result.masks is None:
             return bananas
 
-        for i, cls in enumerate(result.boxes.cls):
-            if int(cls) != BANANA_CLASS_ID:
-                continue
+        keep = result.boxes.cls == BANANA_CLASS_ID
+
+        if not bool(keep.any()):
+            return bananas
+
+        # One device->host copy per frame instead of one per mask
+        boxes = result.boxes.xyxy[keep].cpu().numpy()
+        confs = result.boxes.conf[keep].cpu().numpy()
+        masks = result.masks.data[keep].cpu().numpy() > 0.5
 
+        for box, conf, mask in zip(boxes, confs, masks):
+            crop, offset = crop_mask(mask, box, result.orig_shape)
             bananas.append({
-                "bbox": result.boxes.xyxy[i].tolist(),
-                "confidence": float(result.boxes.conf[i]),
-                "mask": result.masks.data[i].cpu().numpy().astype(bool)
+                "bbox": box.tolist(),
+                "confidence": float(conf),
+                "mask": crop,
+                "offset": offset
             })
 
         return bananas
+
+
+def _backend_class(name: str):
+    if name == "ultralytics":
+        return UltralyticsBackend
+    if name == "onnx":
+        from src.onnx_backend import OnnxBackend
+        return OnnxBackend
+    raise ValueError(f"Unknown detector backend: {name}")
+
+
+def load_backend(name: str = DEFAULT_BACKEND, weights: str = None, warmup: bool = True):
+    """Builds a fresh backend; weights=None uses the backend's default model file."""
+    cls = _backend_class(name)
+    backend = cls(weights) if weights else cls()
+    if warmup:
+        backend.warmup()
+    return backend
+
+
+def get_backend(name: str = DEFAULT_BACKEND, weights: str = None, warmup: bool = True):
+    """Returns the shared backend for (name, weights), loading it on first use."""
+    key = (name, weights)
+    with _BACKENDS_LOCK:
+        backend = _BACKENDS.get(key)
+        if backend is None:
+            print(f"[DETECT] Loading {name} backend {weights or '(default weights)'} (first use in this process)")
+            backend = load_backend(name, weights, warmup)
+            _BACKENDS[key] = backend
+        return backend
+
+
+class BananaDetector:
+    def __init__(self, backend: str = None, weights: str = None,
+                 shared: bool = True, warmup: bool = True, profile=None, metrics=None):
+        # Backend, weights and profile default to the station config (BANANAI_DETECT*)
+        if backend is None or profile is None:
+            from src.config.config import Config
+            if backend is None:
+                backend = Config.DETECTOR_BACKEND
+                weights = weights or Config.DETECTOR_WEIGHTS
+            profile = profile or Config.DETECTION_PROFILE
+
+        self.profile = get_profile(profile)
+        self.metrics = metrics or NULL_METRICS
+
+        # shared=False gives this detector a private copy (e.g. one per worker thread)
+        if shared:
+            self.backend = get_backend(backend, weights, warmup)
+        else:
+            self.backend = load_backend(backend, weights, warmup)
+
+    def detect_frame(self, frame):
+        return self.backend.detect([frame], self.profile, self.metrics)[0]
+
+    def detect_batch(self, frames, batch_size: int = 8):
+        """
+        Runs several frames through the model per forward pass.
+        Returns one detection list per frame, in input order.
+        """
+        frames = list(frames)
+        detections = []
+
+        # Chunking keeps peak memory bounded when replaying a large backlog
+        for start in range(0, len(frames), batch_size):
+            detections.extend(self.backend.detect(frames[start:start + batch_size], self.profile, self.metrics))
+
+        return detections
+
+
+def crop_bounds(bbox, frame_shape):
+    """Integer [x0, y0, x1, y1] pixel window of a bbox, clipped to the frame."""
+    fh, fw = frame_shape[:2]
+    x0, y0 = max(int(np.floor(bbox[0])), 0), max(int(np.floor(bbox[1])), 0)
+    x1, y1 = min(int(np.ceil(bbox[2])), fw), min(int(np.ceil(bbox[3])), fh)
+    return x0, y0, x1, y1
+
+
+def resample_window(window, bounds, window_origin, gain, pad, cell=(1.0, 1.0),
+                    interpolation=cv2.INTER_NEAREST):
+    """
+    Samples a model-space window at the pixel centres of the frame crop
+    bounds = (x0, y0, x1, y1). Frame x maps to letterbox (x + 0.5) * gain + pad,
+    and letterbox to window pixels via cell (window px per letterbox px) and
+    window_origin, so the crop lines up with the frame exactly; resizing the
+    (snapped-outward) window to the crop size would stretch it instead.
+    """
+    x0, y0, x1, y1 = bounds
+    (cx, cy), (pad_x, pad_y), (wx0, wy0) = cell, pad, window_origin
+    transform = np.float32([
+        [gain * cx, 0, ((x0 + 0.5) * gain + pad_x) * cx - 0.5 - wx0],
+        [0, gain * cy, ((y0 + 0.5) * gain + pad_y) * cy - 0.5 - wy0],
+    ])
+    return cv2.warpAffine(window, transform, (x1 - x0, y1 - y0),
+                          flags=interpolation | cv2.WARP_INVERSE_MAP, borderMode=cv2.BORDER_REPLICATE)
+
+
+def crop_mask(mask, bbox, frame_shape):
+    """
+    Cuts a model-resolution mask down to its bbox at frame resolution.
+    Returns (crop, (x0, y0)) where (x0, y0) is the crop's top-left corner in
+    the frame, so per-banana memory scales with banana size, not camera size.
+    """
+    fh, fw = frame_shape[:2]
+    mh, mw = mask.shape[:2]
+
+    x0, y0, x1, y1 = crop_bounds(bbox, frame_shape)
+    if x1 <= x0 or y1 <= y0:
+        return np.zeros((0, 0), dtype=bool), (x0, y0)
+
+    # Undo the letterbox: the model works on a scaled, centre-padded image
+    gain = min(mh / fh, mw / fw)
+    pad_x = (mw - fw * gain) / 2
+    pad_y = (mh - fh * gain) / 2
+
+    mx0 = min(max(int(np.floor(x0 * gain + pad_x)), 0), mw)
+    my0 = min(max(int(np.floor(y0 * gain + pad_y)), 0), mh)
+    mx1 = min(max(int(np.ceil(x1 * gain + pad_x)), mx0 + 1), mw)
+    my1 = min(max(int(np.ceil(y1 * gain + pad_y)), my0 + 1), mh)
+
+    sub = mask[my0:my1, mx0:mx1]
+
+    # Frame-resolution masks (no letterbox) are already aligned: just slice
+    if gain == 1 and (mx0, my0) == (x0 + pad_x, y0 + pad_y) and sub.shape[::-1] == (x1 - x0, y1 - y0):
+        return np.ascontiguousarray(sub, dtype=bool), (x0, y0)
+
+    crop = resample_window(sub.astype(np.uint8), (x0, y0, x1, y1), (mx0, my0), gain, (pad_x, pad_y))
+    return crop.astype(bool), (x0, y0)
@@ -1,46 +1,141 @@
 import cv2
 import numpy as np
 
-def estimate_length(mask: np.ndarray) -> float:
+# PX_TO_CM should be calibrated so your 30cm banana reads ~30.0
+# Higher value = higher result.
+PX_TO_CM = 0.045
+
+MIN_PIXELS = 50           # Fewer mask pixels than this is noise, not a banana
+WIDTH_PROFILE_POINTS = 9  # Fixed-length width profile, tip to tip
+
+
+def _largest_component(mask: np.ndarray) -> np.ndarray:
+    """Keeps only the biggest connected blob (the banana), drops mask debris."""
+    mask = (mask > 0).astype(np.uint8)
+    n, labels, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+    if n <= 2:
+        return mask.astype(bool)
+    biggest = 1 + int(np.argmax(stats[1:, cv2.CC_STAT_AREA]))
+    return labels == biggest
+
+
+def measure_banana(mask: np.ndarray, px_to_cm: float = None,
+                   offset=(0, 0), calibration=None):
     """
-    Google-Level Geometry Engine.
-    Uses Rotated Bounding Box (minAreaRect) for orientation-independent 
-    precision measurement.
+    Medial-axis Geometry Engine.
+    Finds the banana's principal axis, slices the mask into bins along it and
+    takes each slice's centre as a point of the medial axis. The arc length of
+    that centreline follows the fruit's curve, where minAreaRect only saw the chord.
+    Everything is a single vectorized pass over the mask pixels (crop-sized).
+
+    With a CameraCalibration only the centreline and slice-edge points (placed
+    in the frame via the crop `offset`) are undistorted and projected onto the
+    belt plane; otherwise pixels are scaled by px_to_cm (default PX_TO_CM).
+
+    Returns None for empty/degenerate masks, otherwise:
+        length_cm      arc length of the centreline, tip to tip
+        chord_cm       straight tip-to-tip distance
+        curvature      mean centreline curvature (1/cm); 0 = straight
+        width_profile  WIDTH_PROFILE_POINTS widths (cm) sampled tip to tip
+        max_width_cm   widest slice
     """
-    if mask is None or np.sum(mask) == 0:
+    if mask is None or not np.any(mask):
+        return None
+    px_to_cm = PX_TO_CM if px_to_cm is None else px_to_cm
+
+    ys, xs = np.nonzero(_largest_component(mask))
+    if len(xs) < MIN_PIXELS:
         return None
 
-    # Clean the mask
-    mask = (mask > 0).astype(np.uint8) * 255
-    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    # 1. Principal axis (PCA of pixel coordinates)
+    pts = np.column_stack([xs, ys]).astype(np.float64)
+    centre = pts.mean(axis=0)
+    centred = pts - centre
+    _, vecs = np.linalg.eigh(centred.T @ centred)
+    major, minor = vecs[:, 1], vecs[:, 0]
 
-    if not contours:
+    t = centred @ major   # position along the fruit
+    s = centred @ minor   # offset across the fruit
+    # Pixels are 1px squares: pad the extremes by half a pixel
+    t_min, t_max = t.min() - 0.5, t.max() + 0.5
+    extent = t_max - t_min
+    if extent < 2:
         return None
 
-    # Focus on the largest object (the banana)
-    banana_cnt = max(contours, key=cv2.contourArea)
-    
-    # 1. Get the Rotated Bounding Box
-    # This finds the tightest box regardless of the banana's angle
-    rect = cv2.minAreaRect(banana_cnt)
-    (x, y), (w, h), angle = rect
-    
-    # 2. Extract Longitudinal Axis (The longer side)
-    pixel_length = max(w, h)
-
-    # 3. Calibration & Perspective Compensation
-    # PX_TO_CM should be calibrated so your 30cm banana reads ~30.0
-    # Higher value = higher result.
-    PX_TO_CM = 0.045  
-    
-    raw_length_cm = pixel_length * PX_TO_CM
-
-    # 4. Non-Linear Curve Correction
-    # Small bananas often appear larger due to sensor noise; 
-    # we apply a dampening factor to small objects for higher accuracy.
-    if raw_length_cm < 18:
-        refined_length = raw_length_cm * 0.92
+    # 2. Slice along the axis: ~3 px per bin, between 8 and 64 bins
+    n_bins = int(np.clip(extent // 3, 8, 64))
+    bin_len = extent / n_bins
+    bins = np.minimum(((t - t_min) / bin_len).astype(np.intp), n_bins - 1)
+
+    counts = np.bincount(bins, minlength=n_bins)
+    filled = counts > 0
+    mid_s = np.bincount(bins, weights=s, minlength=n_bins)[filled] / counts[filled]
+    mid_t = t_min + (np.flatnonzero(filled) + 0.5) * bin_len
+
+    # 3-tap smoothing removes pixel-staircase noise from the centreline
+    if len(mid_s) >= 3:
+        mid_s = np.convolve(np.pad(mid_s, 1, mode="edge"), np.ones(3) / 3, mode="valid")
+
+    # 3. Centreline from tip to tip and its arc length
+    line_t = np.concatenate([[t_min], mid_t, [t_max]])
+    line_s = np.concatenate([[mid_s[0]], mid_s, [mid_s[-1]]])
+    arc_px = float(np.hypot(np.diff(line_t), np.diff(line_s)).sum())
+    chord_px = float(np.hypot(line_t[-1] - line_t[0], line_s[-1] - line_s[0]))
+
+    # 4. Curvature from a quadratic fit of the centreline: k = |s''| / (1 + s'^2)^1.5
+    if len(mid_t) >= 3:
+        a, b, _ = np.polyfit(mid_t, mid_s, 2)
+        slope = 2 * a * mid_t + b
+        curvature_px = float(np.mean(np.abs(2 * a) / (1 + slope ** 2) ** 1.5))
     else:
-        refined_length = raw_length_cm
+        curvature_px = 0.0
+
+    # 5. Width profile: cross-section extent of each slice (+1 px footprint)
+    s_lo = np.full(n_bins, np.inf)
+    s_hi = np.full(n_bins, -np.inf)
+    np.minimum.at(s_lo, bins, s)
+    np.maximum.at(s_hi, bins, s)
+    widths_px = np.where(filled, s_hi - s_lo + 1, 0.0)
+
+    profile_t = np.linspace(t_min + bin_len / 2, t_max - bin_len / 2, WIDTH_PROFILE_POINTS)
+    bin_centres = t_min + (np.arange(n_bins) + 0.5) * bin_len
+
+    if calibration is None:
+        arc_cm, chord_cm = arc_px * px_to_cm, chord_px * px_to_cm
+        curvature = curvature_px / px_to_cm
+        widths_cm = widths_px * px_to_cm
+    else:
+        # Axis coordinates -> frame pixels -> belt-plane cm, for a few points only
+        def to_plane(t_vals, s_vals):
+            xy = centre + np.outer(t_vals, major) + np.outer(s_vals, minor) + np.asarray(offset)
+            return calibration.to_plane(xy)
+
+        line_cm = to_plane(line_t, line_s)
+        arc_cm = float(np.hypot(*np.diff(line_cm, axis=0).T).sum())
+        chord_cm = float(np.hypot(*(line_cm[-1] - line_cm[0])))
+        curvature = curvature_px * arc_px / arc_cm if arc_cm > 0 else 0.0
+
+        # Slice edges (with the half-pixel footprint) give true widths on the belt
+        lo = to_plane(mid_t, s_lo[filled] - 0.5)
+        hi = to_plane(mid_t, s_hi[filled] + 0.5)
+        widths_cm = np.zeros(n_bins)
+        widths_cm[filled] = np.hypot(*(hi - lo).T)
 
-    return round(float(refined_length), 2)
\ No newline at end of file
+    width_profile = np.interp(profile_t, bin_centres, widths_cm)
+
+    return {
+        "length_cm": round(float(arc_cm), 2),
+        "chord_cm": round(float(chord_cm), 2),
+        "curvature": round(float(curvature), 4),
+        "width_profile": [round(float(w), 2) for w in width_profile],
+        "max_width_cm": round(float(widths_cm.max()), 2),
+    }
+
+
+def estimate_length(mask: np.ndarray) -> float:
+    """
+    Length along the banana's curve (centreline arc length) in cm.
+    Works on full-frame masks or bbox crops; length does not depend on offset.
+    """
+    geometry = measure_banana(mask)
+    return geometry["length_cm"] if geometry else None
@@ -0,0 +1,149 @@
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+
+class Histogram:
+    """Latency histogram over a bounded window of recent samples (seconds)."""
+
+    def __init__(self, window: int = 4096):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float):
+        self.samples.append(value)
+        self.count += 1
+        self.total += value
+
+    def summary(self) -> dict:
+        if not self.samples:
+            return {"count": 0}
+        p50, p95, p99 = np.percentile(np.fromiter(self.samples, dtype=float), [50, 95, 99])
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 2),
+            "p50_ms": round(p50 * 1000, 2),
+            "p95_ms": round(p95 * 1000, 2),
+            "p99_ms": round(p99 * 1000, 2),
+        }
+
+
+class Metrics:
+    """
+    Per-stage latency histograms plus counters for the inspection pipeline.
+    Optionally rewrites a JSON or Prometheus-text file every export_interval seconds.
+    """
+
+    def __init__(self, export_path: Path = None, export_format: str = "json",
+                 export_interval: float = 10.0, window: int = 4096):
+        if export_format not in ("json", "prometheus"):
+            raise ValueError(f"Unknown export format: {export_format}")
+        self.export_path = Path(export_path) if export_path else None
+        self.export_format = export_format
+        self.export_interval = export_interval
+        self.window = window
+
+        self.histograms = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+        self._last_export = time.monotonic()
+
+    @contextmanager
+    def timer(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def observe(self, stage: str, seconds: float):
+        with self._lock:
+            hist = self.histograms.get(stage)
+            if hist is None:
+                hist = self.histograms[stage] = Histogram(self.window)
+            hist.observe(seconds)
+
+    def incr(self, counter: str, n: int = 1):
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + n
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "stages": {name: h.summary() for name, h in self.histograms.items()},
+                "counters": dict(self.counters),
+            }
+
+    # --- EXPORT ---
+
+    def maybe_export(self):
+        """Cheap to call on the hot path; only writes once per export_interval."""
+        if self.export_path is None:
+            return
+        now = time.monotonic()
+        # Inference workers share one Metrics: only one of them gets to write
+        with self._lock:
+            if now - self._last_export < self.export_interval:
+                return
+            self._last_export = now
+        self.export()
+
+    def export(self, path: Path = None):
+        path = Path(path) if path else self.export_path
+        if path is None:
+            return
+        if self.export_format == "prometheus":
+            text = self.to_prometheus()
+        else:
+            text = json.dumps(self.snapshot(), indent=2)
+
+        # Write-then-rename so scrapers never read a half-written file
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_text(text)
+        tmp.replace(path)
+
+    def to_prometheus(self) -> str:
+        snap = self.snapshot()
+        lines = [
+            "# HELP bananai_stage_latency_seconds Pipeline stage latency.",
+            "# TYPE bananai_stage_latency_seconds summary",
+        ]
+        for stage, s in snap["stages"].items():
+            if not s["count"]:
+                continue
+            for q, key in (("0.5", "p50_ms"), ("0.95", "p95_ms"), ("0.99", "p99_ms")):
+                lines.append(f'bananai_stage_latency_seconds{{stage="{stage}",quantile="{q}"}} {s[key] / 1000:.6f}')
+            lines.append(f'bananai_stage_latency_seconds_count{{stage="{stage}"}} {s["count"]}')
+        for name, value in snap["counters"].items():
+            lines.append(f"# TYPE bananai_{name}_total counter")
+            lines.append(f"bananai_{name}_total {value}")
+        return "\n".join(lines) + "\n"
+
+
+class NullMetrics(Metrics):
+    """Default no-op instrumentation: keeps the hot path free of bookkeeping."""
+
+    def __init__(self):
+        super().__init__()
+
+    @contextmanager
+    def timer(self, stage: str):
+        yield
+
+    def observe(self, stage: str, seconds: float):
+        pass
+
+    def incr(self, counter: str, n: int = 1):
+        pass
+
+    def maybe_export(self):
+        pass
+
+
+NULL_METRICS = NullMetrics()
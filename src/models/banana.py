@@ -1,10 +1,19 @@
 from .fruit import Fruit
 from src.services.weight_service import estimate_weight_grams
 
+# Everything Banana.to_dict writes: a sample dict with only these keys is a serialized Banana
+BANANA_KEYS = frozenset(("length_cm", "ripeness", "confidence", "mean_hsv", "quality_index"))
+
 class Banana(Fruit):
+    # Slots instead of a per-object dict; quality index and weight are
+    # computed once and dropped whenever an input changes.
+    __slots__ = ("_length_cm", "_ripeness", "_h", "_s", "_v", "_quality", "_weight_g")
+
     def __init__(self, length_cm, ripeness, confidence, mean_hsv=(0, 0, 0)):
         # Fruit class usually takes (confidence, name)
         super().__init__(confidence)
+        self._quality = None
+        self._weight_g = None
 
         if length_cm <= 0:
             # Fallback for corrupted data during load
@@ -13,9 +22,48 @@ class Banana(Fruit):
             self.length_cm = float(length_cm)
             
         self.ripeness = ripeness if ripeness else "unknown"
-        self.confidence = float(confidence)
         self.mean_hsv = mean_hsv
 
+    # --- Fields (setters invalidate the cached derived values) ---
+
+    @property
+    def length_cm(self) -> float:
+        return self._length_cm
+
+    @length_cm.setter
+    def length_cm(self, value):
+        self._length_cm = float(value)
+        self._quality = None
+        self._weight_g = None
+
+    @property
+    def ripeness(self) -> str:
+        return self._ripeness
+
+    @ripeness.setter
+    def ripeness(self, value):
+        self._ripeness = value
+        self._quality = None
+
+    @property
+    def confidence(self) -> float:
+        return float(self._confidence)
+
+    @confidence.setter
+    def confidence(self, value):
+        self._confidence = value
+        self._quality = None
+
+    @property
+    def mean_hsv(self) -> tuple:
+        return (self._h, self._s, self._v)
+
+    @mean_hsv.setter
+    def mean_hsv(self, value):
+        # Three slots instead of a list/tuple object per banana
+        h, s, v = (list(value or ()) + [0, 0, 0])[:3]
+        self._h, self._s, self._v = float(h), float(s), float(v)
+
     # --- Logistics Quality Model (The Brain) ---
 
     def quality_index(self) -> float:
@@ -23,6 +71,11 @@ class Banana(Fruit):
         High-precision quality scoring calibrated to 0.26 - 0.74 real-world data.
         This score determines if the batch is 'Premium' (0.65+).
         """
+        if self._quality is None:
+            self._quality = self._compute_quality_index()
+        return self._quality
+
+    def _compute_quality_index(self) -> float:
         # 1. Base Score from AI Confidence (30% weight)
         score = (self._confidence or 0.8) * 0.30
 
@@ -50,7 +103,9 @@ class Banana(Fruit):
     # --- Physical Estimation ---
 
     def estimated_weight_g(self) -> float:
-        return estimate_weight_grams(self.length_cm)
+        if self._weight_g is None:
+            self._weight_g = estimate_weight_grams(self.length_cm)
+        return self._weight_g
 
     def estimated_weight(self) -> float:
         return self.estimated_weight_g()
@@ -62,18 +117,35 @@ class Banana(Fruit):
             "length_cm": self.length_cm,
             "ripeness": self.ripeness,
             "confidence": self._confidence,
-            "mean_hsv": self.mean_hsv,
+            "mean_hsv": list(self.mean_hsv),
             "quality_index": self.quality_index()
         }
 
+    @staticmethod
+    def round_trips(data: dict) -> bool:
+        """True if data is exactly what to_dict writes, so from_dict loses nothing."""
+        return (
+            isinstance(data, dict)
+            and data.keys() <= BANANA_KEYS
+            and isinstance(data.get("length_cm"), (int, float)) and data["length_cm"] > 0
+            and isinstance(data.get("ripeness"), str) and bool(data["ripeness"])
+            and isinstance(data.get("confidence"), (int, float))
+        )
+
     @classmethod
     def from_dict(cls, data: dict) -> 'Banana':
-        return cls(
-            length_cm=data.get("length_cm", 0),
-            ripeness=data.get("ripeness", "unknown"),
-            confidence=data.get("confidence", 0),
-            mean_hsv=data.get("mean_hsv", (0, 0, 0))
-        )
+        # Fills the slots directly: a fresh object has no caches for the setters to drop
+        banana = cls.__new__(cls)
+        length_cm = data.get("length_cm", 0)
+        banana._length_cm = float(length_cm) if length_cm > 0 else 15.0
+        banana._ripeness = data.get("ripeness") or "unknown"
+        banana._confidence = data.get("confidence", 0)
+        banana.mean_hsv = data.get("mean_hsv", (0, 0, 0))
+        banana._weight_g = None
+        # The saved score is what the batch was graded with: keep it
+        quality = data.get("quality_index")
+        banana._quality = float(quality) if isinstance(quality, (int, float)) else None
+        return banana
 
     # --- Dunder methods ---
 
@@ -3,6 +3,9 @@ import time
 from typing import List, Dict, Optional, Any
 # Ensure this import matches your project structure
 from .banana_sample import BananaSample
+from src.services.statistics_service import RunningStats
+
+SCHEMA_VERSION = 2  # v1: unversioned files, same layout
 
 class BananaBatch:
     """
@@ -18,10 +21,17 @@ class BananaBatch:
         self.remaining_weight_kg = float(total_weight_kg)
         self.samples: List[BananaSample] = []
         
-        # Runtime Cache - prevents heavy recalculation on every UI render
+        # Stats locked in from disk: trusted until the samples change
         self._cached_quality = None
         self._cached_life = None
 
+        # Running aggregates, updated in O(1) by add_sample so a batch fed
+        # from the line never rescans its samples on a UI render
+        self._quality_stats = RunningStats()
+        self._ripeness_counts: Dict[str, int] = {}
+        self._min_life: Optional[int] = None
+        self._aggregated = True  # False while they lag samples loaded from disk
+
     # --- INVENTORY LOGIC ---
 
     def reserve_stock(self, amount_kg: float) -> bool:
@@ -45,9 +55,19 @@ class BananaBatch:
 
     # --- TELEMETRY EXTRACTION ---
 
-    def add_sample(self, sample: BananaSample):
-        """Ingests new CV data and invalidates the cache."""
+    def __len__(self) -> int:
+        """Number of inspected samples (InspectionController relies on this)."""
+        return len(self.samples)
+
+    def add_sample(self, sample: BananaSample, shelf_life_days: Optional[int] = None):
+        """
+        Ingests new CV data and folds it into the running aggregates.
+        shelf_life_days overrides what the sample itself carries (the pipeline
+        grades shelf life per detection; a Banana doesn't store it).
+        """
+        self._ensure_aggregates()
         self.samples.append(sample)
+        self._aggregate(sample, shelf_life_days)
         self._cached_quality = None
         self._cached_life = None
 
@@ -64,102 +84,127 @@ class BananaBatch:
                 return attr() if callable(attr) else attr
         return None
 
-    def average_quality(self) -> float:
-        """Calculates mean quality across all visual samples."""
-        if self._cached_quality is not None: return self._cached_quality
-        if not self.samples: return 0.0
-
-        scores = []
+    def _aggregate(self, sample, shelf_life_days: Optional[int] = None):
+        source = sample.banana if hasattr(sample, 'banana') else sample.get('banana', {})
+
+        # Maps multiple possible key names from various CV pipeline versions
+        quality = self._extract(source, ['quality_index', 'quality_score', 'quality'])
+        if quality is not None:
+            self._quality_stats.push(quality)
+
+        ripeness = self._extract(source, ['ripeness']) or "unknown"
+        self._ripeness_counts[ripeness] = self._ripeness_counts.get(ripeness, 0) + 1
+
+        if shelf_life_days is None:
+            shelf_life_days = self._extract(source, ['shelf_life_days', 'days_left'])
+        if shelf_life_days is not None:
+            days = int(shelf_life_days)
+            self._min_life = days if self._min_life is None else min(self._min_life, days)
+
+    def _ensure_aggregates(self):
+        """One pass over samples that came from a file saved without aggregates."""
+        if self._aggregated:
+            return
+        self._quality_stats = RunningStats()
+        self._ripeness_counts = {}
+        # The locked shelf life already covers the saved samples
+        self._min_life = int(self._cached_life) if self._cached_life is not None else None
         for s in self.samples:
-            # Maps multiple possible key names from various CV pipeline versions
-            val = self._extract(s.banana, ['quality_index', 'quality_score', 'quality'])
-            if val is not None:
-                scores.append(float(val))
+            self._aggregate(s)
+        self._aggregated = True
 
-        self._cached_quality = round(sum(scores) / len(scores), 2) if scores else 0.0
-        return self._cached_quality
+    def average_quality(self) -> float:
+        """Mean quality across all visual samples."""
+        if self._cached_quality is not None: return self._cached_quality
+        self._ensure_aggregates()
+        stats = self._quality_stats
+        return round(stats.mean, 2) if stats.count else 0.0
 
     def estimated_shelf_life_days(self) -> int:
         """
         Calculates the shelf life.
-        PRIORITY: 1. Locked JSON Value > 2. Sample Extraction > 3. Fallback
+        PRIORITY: 1. Locked JSON Value > 2. Shortest sample life > 3. Fallback
         """
         # If we loaded from JSON, this will be set. We MUST trust it.
         if self._cached_life is not None:
             return int(self._cached_life)
-            
-        # If no cache, try to calculate from samples
-        lives = []
-        for s in self.samples:
-            source = s.banana if hasattr(s, 'banana') else s.get('banana', {})
-            val = self._extract(source, ['shelf_life_days', 'days_left'])
-            if val is not None:
-                lives.append(int(val))
-        
-        if lives:
-            self._cached_life = min(lives)
-            return int(self._cached_life)
+
+        self._ensure_aggregates()
+        if self._min_life is not None:
+            return self._min_life
 
         return 7 # Absolute floor if JSON and Samples are both missing data
 
-    @classmethod
-    def from_dict(cls, data: dict) -> 'BananaBatch':
+    def stats(self) -> dict:
         """
-        REHYDRATION ENGINE: This is where we force the object to 
-        accept the JSON's real values.
+        O(1) snapshot of the running aggregates. Every field comes from the
+        aggregates, so they always agree with each other. While a batch serves
+        the computed_stats it was saved with (what average_quality() and
+        estimated_shelf_life_days() return, and what inventory sells under),
+        those are reported separately under "locked".
         """
-        batch = cls(
-            banana_type=data.get("banana_type", "Cavendish"),
-            batch_id=data.get("batch_id"),
-            total_weight_kg=float(data.get("total_weight_kg", 0.0)),
-            received_date=data.get("received_date")
-        )
-        batch.remaining_weight_kg = float(data.get("remaining_weight_kg", batch.total_weight_kg))
-        
-        # --- THE MASTER FIX ---
-        # Look specifically at the 'computed_stats' block in your JSON
-        stats = data.get("computed_stats", {})
-        
-        # We LOCK these values into the cache immediately.
-        # This prevents the 'ripeness mapping' from ever running.
-        if "shelf_life_days" in stats:
-            batch._cached_life = int(stats["shelf_life_days"])
-        
-        if "avg_quality" in stats:
-            batch._cached_quality = float(stats["avg_quality"])
+        self._ensure_aggregates()
+        quality = self._quality_stats
+        snapshot = {
+            "samples": len(self.samples),
+            "avg_quality": round(quality.mean, 2) if quality.count else 0.0,
+            "quality": quality.describe(),
+            "quality_variance": round(quality.variance, 4),
+            "shelf_life_days": self._min_life if self._min_life is not None else 7,
+            "min_shelf_life_days": self._min_life,
+            "ripeness_counts": dict(self._ripeness_counts),
+        }
+        locked = {}
+        if self._cached_quality is not None:
+            locked["avg_quality"] = self._cached_quality
+        if self._cached_life is not None:
+            locked["shelf_life_days"] = int(self._cached_life)
+        if locked:
+            snapshot["locked"] = locked
+        return snapshot
 
-        # Reconstruct samples
-        if "samples" in data:
-            from .banana_sample import BananaSample
-            for s_data in data["samples"]:
-                try:
-                    batch.samples.append(BananaSample.from_dict(s_data))
-                except:
-                    batch.samples.append(s_data)
-                    
-        return batch
-    
     # --- SERIALIZATION ---
 
-    def to_dict(self) -> dict:
-        """Converts object to JSON-ready dictionary."""
-        return {
+    def to_dict(self, include_samples: bool = True) -> dict:
+        """Converts object to JSON-ready dictionary (header and stats only without samples)."""
+        computed_stats = {
+            "avg_quality": self.average_quality(),
+            "shelf_life_days": self.estimated_shelf_life_days()
+        }
+        if self._aggregated:
+            # Lets from_dict pick the aggregates up without a pass over the samples
+            computed_stats.update({
+                "quality": self._quality_stats.to_dict(),
+                "ripeness_counts": self._ripeness_counts,
+                "min_shelf_life_days": self._min_life,
+            })
+
+        data = {
             "batch_id": self.batch_id,
             "banana_type": self.banana_type,
             "received_date": self.received_date,
             "total_weight_kg": self.total_weight_kg,
             "remaining_weight_kg": self.remaining_weight_kg,
             "status": self.status,
-            "computed_stats": {
-                "avg_quality": self.average_quality(),
-                "shelf_life_days": self.estimated_shelf_life_days()
-            },
-            "samples": [s.to_dict() if hasattr(s, 'to_dict') else s for s in self.samples]
+            "schema_version": SCHEMA_VERSION,
+            "computed_stats": computed_stats,
         }
+        if include_samples:
+            data["samples"] = [s.to_dict() if hasattr(s, 'to_dict') else s for s in self.samples]
+        return data
 
     @classmethod
     def from_dict(cls, data: dict) -> 'BananaBatch':
-        """Reconstructs the object from disk data."""
+        """
+        Rehydrates a saved batch in one pass.
+        Files without a schema_version are the pre-versioning layout, which
+        reads the same way; computed_stats is trusted whenever present, so
+        loading never re-grades the samples.
+        """
+        version = data.get("schema_version", 1)
+        if version > SCHEMA_VERSION:
+            raise ValueError(f"Batch schema v{version} is newer than supported v{SCHEMA_VERSION}")
+
         batch = cls(
             banana_type=data.get("banana_type", "Cavendish"),
             batch_id=data.get("batch_id"),
@@ -167,9 +212,25 @@ class BananaBatch:
             received_date=data.get("received_date")
         )
         batch.remaining_weight_kg = float(data.get("remaining_weight_kg", batch.total_weight_kg))
-        
-        if "samples" in data:
-            for s_data in data["samples"]:
-                # Logic assumes BananaSample has a from_dict method
-                batch.samples.append(BananaSample.from_dict(s_data))
-        return batch
\ No newline at end of file
+
+        # Lock the saved stats into the cache: the 'ripeness mapping' never runs
+        stats = data.get("computed_stats") or {}
+        if stats.get("shelf_life_days") is not None:
+            batch._cached_life = int(stats["shelf_life_days"])
+        if stats.get("avg_quality") is not None:
+            batch._cached_quality = float(stats["avg_quality"])
+
+        # Sample-shaped dicts become BananaSamples; anything else is kept verbatim
+        batch.samples = [
+            BananaSample.from_dict(s) if isinstance(s, dict) and "banana" in s else s
+            for s in data.get("samples") or ()
+        ]
+
+        # Aggregates saved alongside: otherwise rebuilt on first add_sample / stats()
+        if "quality" in stats and "ripeness_counts" in stats:
+            batch._quality_stats = RunningStats.from_dict(stats["quality"])
+            batch._ripeness_counts = dict(stats["ripeness_counts"])
+            batch._min_life = stats.get("min_shelf_life_days")
+        else:
+            batch._aggregated = not batch.samples
+        return batch
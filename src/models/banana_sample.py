@@ -1,6 +1,9 @@
 import time
+from .banana import Banana
 
 class BananaSample:
+    __slots__ = ("banana", "timestamp")
+
     def __init__(self, banana, timestamp=None):
         # banana can be the raw dict from detections
         self.banana = banana 
@@ -21,7 +24,12 @@ class BananaSample:
 
     @classmethod
     def from_dict(cls, data):
+        banana = data.get("banana", {})
+        # Serialized Bananas come back as compact objects; any other payload
+        # (older raw detection dicts) is kept verbatim so nothing is lost on re-save
+        if Banana.round_trips(banana):
+            banana = Banana.from_dict(banana)
         return cls(
-            banana=data.get("banana", {}),
+            banana=banana,
             timestamp=data.get("timestamp")
         )
\ No newline at end of file
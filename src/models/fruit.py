@@ -1,6 +1,9 @@
 from abc import ABC, abstractmethod
 
 class Fruit(ABC):
+    # No per-instance __dict__: batches hold thousands of these
+    __slots__ = ("_confidence",)
+
     def __init__(self, confidence: float):
         self._confidence = confidence
 
@@ -1,19 +1,72 @@
 from __future__ import annotations
+import bisect
 from typing import List, Tuple, Dict, Optional, TYPE_CHECKING
 from src.services.shipping_service import ShippingService
 
 if TYPE_CHECKING:
     from .banana_batch import BananaBatch
 
+# Quality tiers, best first: (name, minimum average quality index)
+QUALITY_TIERS = (
+    ("premium", 0.65),
+    ("standard", 0.45),
+    ("economic", 0.0),
+)
+
+def quality_tier(avg_quality: float) -> str:
+    for name, min_q in QUALITY_TIERS:
+        if avg_quality >= min_q:
+            return name
+    return QUALITY_TIERS[-1][0]
+
+def tier_min_quality(requested_tier: str) -> float:
+    """Minimum quality index a requested tier sells at (P/S/E prefixes accepted)."""
+    req = requested_tier.strip().lower()
+    for name, min_q in QUALITY_TIERS:
+        if req and name.startswith(req[0]):
+            return min_q
+    return QUALITY_TIERS[-1][1]  # Unknown tiers sell as the lowest
+
 class Inventory:
     """
     High-level Controller for the Warehouse.
     Manages global stock and executes logistics matching algorithms
     using REAL real-time batch data.
+
+    Recommendation index: one list per quality tier, kept sorted by shelf life
+    with bisect. A proposal query bisects each tier to the batches that survive
+    the transit and only touches those, instead of re-scanning and re-sorting
+    the whole warehouse.
+
+    Live stock is a batch_id -> batch dict with a running kg total, so lookups
+    and stock totals are O(1). A batch is evicted (stock and index) the moment
+    reserve_stock depletes it.
     """
     def __init__(self):
-        # Holds the live list of BananaBatch objects
-        self.batches: List[BananaBatch] = []
+        self._reset()
+
+    def _reset(self):
+        # Live BananaBatch objects by batch_id (insertion ordered)
+        self._by_id: Dict[str, BananaBatch] = {}
+        self._total_kg = 0.0
+
+        # tier -> sorted [(shelf_life, seq, avg_quality, batch)]
+        self._tiers: Dict[str, list] = {name: [] for name, _ in QUALITY_TIERS}
+        # batch_id -> (tier, shelf_life, seq): where the batch sits in the index
+        self._index_keys: Dict[str, tuple] = {}
+        self._seq = 0
+
+    @property
+    def batches(self) -> List[BananaBatch]:
+        """Live batches with stock left, in arrival order."""
+        return list(self._by_id.values())
+
+    @batches.setter
+    def batches(self, batches: List[BananaBatch]):
+        self.reload(batches)
+
+    def __len__(self) -> int:
+        return len(self._by_id)
 
     def add_batch(self, batch: BananaBatch):
         """
@@ -21,7 +74,53 @@ class Inventory:
         Validation: Only tracks batches that actually have stock left.
         """
         if batch.remaining_weight_kg > 0:
-            self.batches.append(batch)
+            # Same batch_id again (e.g. re-read from disk): the newer object wins
+            self._evict(batch.batch_id)
+            self._by_id[batch.batch_id] = batch
+            self._total_kg += batch.remaining_weight_kg
+            self._index(batch)
+
+    def reload(self, batches: List[BananaBatch]):
+        """Replaces the whole stock (e.g. after archiving) and rebuilds the index."""
+        self._reset()
+        for batch in batches:
+            self.add_batch(batch)
+
+    def reserve_stock(self, batch: BananaBatch, amount_kg: float) -> bool:
+        """Depletes a batch through the inventory, so totals and index follow its stock."""
+        before = batch.remaining_weight_kg
+        ok = batch.reserve_stock(amount_kg)
+        if ok and self._by_id.get(batch.batch_id) is batch:
+            self._total_kg -= before - batch.remaining_weight_kg
+            if batch.remaining_weight_kg <= 0:
+                self._evict(batch.batch_id)
+        return ok
+
+    def _evict(self, batch_id: str):
+        batch = self._by_id.pop(batch_id, None)
+        if batch is not None:
+            self._total_kg -= batch.remaining_weight_kg
+            self._unindex(batch)
+
+    # --- RECOMMENDATION INDEX ---
+
+    def _index(self, batch: BananaBatch):
+        avg_q = batch.average_quality()
+        life = batch.estimated_shelf_life_days()
+        tier = quality_tier(avg_q)
+        self._seq += 1
+        bisect.insort(self._tiers[tier], (life, self._seq, avg_q, batch))
+        self._index_keys[batch.batch_id] = (tier, life, self._seq)
+
+    def _unindex(self, batch: BananaBatch):
+        key = self._index_keys.pop(batch.batch_id, None)
+        if key is None:
+            return
+        tier, life, seq = key
+        entries = self._tiers[tier]
+        i = bisect.bisect_left(entries, (life, seq))
+        if i < len(entries) and entries[i][1] == seq:
+            del entries[i]
 
     def get_recommendations(
         self, 
@@ -35,64 +134,39 @@ class Inventory:
         1. Shipping Viability (Shelf Life vs. Transit)
         2. Quality Tier (Avg Quality Index)
         """
-        perfect_matches = []
-        alternatives = []
-        
         # 1. Tier Thresholding based on Quality Index
-        req = requested_tier.lower()
-        if req.startswith('p'): # Premium
-            min_q = 0.65
-        elif req.startswith('s'): # Standard
-            min_q = 0.45
-        else: # Economic
-            min_q = 0.0
-
-        for batch in self.batches:
-            # --- REAL DATA EXTRACTION ---
-            # We use the methods that look at the batch's internal JSON stats
-            current_life = batch.estimated_shelf_life_days()
-            avg_q = batch.average_quality()
-            
-            # --- LOGISTICS CORE ---
-            # Shipping viability: To avoid 'No Stock' errors, we allow 
-            # delivery if shelf_life >= transit_days (inclusive)
-            if transit_days > 0:
-                can_survive = current_life >= transit_days
-            else:
-                can_survive = current_life > 0
+        min_q = tier_min_quality(requested_tier)
+
+        # Shipping viability: To avoid 'No Stock' errors, we allow 
+        # delivery if shelf_life >= transit_days (inclusive)
+        min_life = transit_days if transit_days > 0 else 1
 
-            if not can_survive:
-                continue
+        perfect_matches = []
+        alternatives = []
 
-            # --- MATCHING LOGIC ---
+        # Tier lists are sorted by shelf life: bisect straight to the survivors
+        for tier, tier_min_q in QUALITY_TIERS:
+            entries = self._tiers[tier]
+            survivors = entries[bisect.bisect_left(entries, (min_life,)):]
             # Perfect Match: Meets the quality tier requested in your rules
-            quality_match = avg_q >= min_q
-            
-            if quality_match:
-                perfect_matches.append(batch)
+            if tier_min_q >= min_q:
+                perfect_matches.extend(survivors)
             else:
                 # Alternative: survives shipping but different quality
-                alternatives.append(batch)
+                alternatives.extend(survivors)
 
-        # 2. SORTING (Based on Real Freshness/Quality)
-        # Sort Perfect Matches: Highest Quality first, then most Shelf Life
-        perfect_matches.sort(
-            key=lambda x: (x.average_quality(), x.estimated_shelf_life_days()), 
-            reverse=True
-        )
-        
-        # Sort Alternatives: Prioritize Quality
-        alternatives.sort(key=lambda x: x.average_quality(), reverse=True)
+        # 2. SORTING (only the k survivors; seq keeps insertion order on ties)
+        # Perfect Matches: Highest Quality first, then most Shelf Life
+        perfect_matches.sort(key=lambda e: (-e[2], -e[0], e[1]))
+        # Alternatives: Prioritize Quality
+        alternatives.sort(key=lambda e: (-e[2], e[1]))
 
-        return perfect_matches, alternatives
+        return [e[3] for e in perfect_matches], [e[3] for e in alternatives]
 
     def get_total_stock_kg(self) -> float:
-        """Sum of real remaining_weight_kg from all batches."""
-        return sum(b.remaining_weight_kg for b in self.batches)
+        """Sum of real remaining_weight_kg from all batches (kept as a running total)."""
+        return round(max(self._total_kg, 0.0), 2)
 
     def find_batch_by_id(self, batch_id: str) -> Optional[BananaBatch]:
         """Finds specific batch by the real batch_id string from JSON."""
-        for b in self.batches:
-            if b.batch_id == batch_id:
-                return b
-        return None
\ No newline at end of file
+        return self._by_id.get(batch_id)
\ No newline at end of file
@@ -0,0 +1,49 @@
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """
+    Cheap frame-difference gate for continuous inspection.
+    Compares a downscaled grayscale copy of each frame with the last frame
+    that was actually inspected, and only lets YOLO run when enough of the
+    field of view changed (new fruit entered) or max_skip frames went by.
+    """
+
+    def __init__(self, scale_width: int = 160, pixel_threshold: int = 25,
+                 min_changed: float = 0.02, max_skip: int = 90):
+        self.scale_width = scale_width
+        self.pixel_threshold = pixel_threshold
+        self.min_changed = min_changed
+        self.max_skip = max_skip
+
+        self._reference = None
+        self._skipped = 0
+
+    def _thumbnail(self, frame) -> np.ndarray:
+        h, w = frame.shape[:2]
+        size = (self.scale_width, max(1, int(h * self.scale_width / w)))
+        small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def changed_fraction(self, thumb: np.ndarray) -> float:
+        if self._reference is None or self._reference.shape != thumb.shape:
+            return 1.0
+        diff = cv2.absdiff(thumb, self._reference)
+        return float(np.count_nonzero(diff > self.pixel_threshold)) / diff.size
+
+    def should_inspect(self, frame) -> bool:
+        thumb = self._thumbnail(frame)
+
+        if self.changed_fraction(thumb) >= self.min_changed or self._skipped >= self.max_skip:
+            self._reference = thumb
+            self._skipped = 0
+            return True
+
+        self._skipped += 1
+        return False
+
+    def reset(self):
+        self._reference = None
+        self._skipped = 0
@@ -0,0 +1,159 @@
+import cv2
+import numpy as np
+
+from src.instrumentation import NULL_METRICS
+from src.detect import DEFAULT_PROFILE, DEFAULT_WEIGHTS, DetectionProfile, DetectorBackend, crop_bounds, resample_window
+
+DEFAULT_ONNX_WEIGHTS = "yolov8s-seg.onnx"
+
+
+def export_onnx(weights: str = DEFAULT_WEIGHTS, imgsz: int = 640) -> str:
+    """
+    One-off export of the PyTorch weights to ONNX (needs ultralytics installed
+    on the exporting machine only). Returns the path of the .onnx file.
+    """
+    from ultralytics import YOLO
+    return YOLO(weights).export(format="onnx", imgsz=imgsz, dynamic=True, simplify=True)
+
+
+class OnnxBackend(DetectorBackend):
+    """
+    ONNX Runtime CPU backend for an exported YOLOv8 segmentation model.
+    Decodes only the profile's classes (banana): box decode, NMS and mask
+    assembly are done here in NumPy, with masks built only inside each bbox.
+    Execution providers come from Config.ONNX_PROVIDERS (e.g. OpenVINO, CPU).
+    """
+
+    name = "onnx"
+
+    def __init__(self, weights: str = DEFAULT_ONNX_WEIGHTS, providers=None):
+        import onnxruntime as ort
+
+        if providers is None:
+            from src.config.config import Config
+            providers = [p.strip() for p in Config.ONNX_PROVIDERS.split(",") if p.strip()]
+
+        available = set(ort.get_available_providers())
+        providers = [p for p in providers if p in available] or ["CPUExecutionProvider"]
+
+        self.session = ort.InferenceSession(weights, providers=providers)
+
+        inp = self.session.get_inputs()[0]
+        self.input_name = inp.name
+        _, _, h, w = inp.shape
+        # Dynamic axes come back as strings; then the profile's imgsz is used
+        self.fixed_size = (h, w) if isinstance(h, int) and isinstance(w, int) else None
+        self.dynamic_batch = not isinstance(inp.shape[0], int)
+
+    # --- PRE-PROCESSING ---
+
+    def _input_size(self, profile: DetectionProfile):
+        return self.fixed_size or (profile.imgsz, profile.imgsz)
+
+    def _letterbox(self, frame, input_size):
+        """Resize + centre-pad like ultralytics. Returns (image, gain, (pad_x, pad_y))."""
+        in_h, in_w = input_size
+        h, w = frame.shape[:2]
+        gain = min(in_h / h, in_w / w)
+        new_w, new_h = int(round(w * gain)), int(round(h * gain))
+
+        resized = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+        pad_x, pad_y = (in_w - new_w) / 2, (in_h - new_h) / 2
+        top, left = int(round(pad_y - 0.1)), int(round(pad_x - 0.1))
+
+        image = np.full((in_h, in_w, 3), 114, dtype=np.uint8)
+        image[top:top + new_h, left:left + new_w] = resized
+        return image, gain, (left, top)
+
+    def _blob(self, images):
+        # BGR HWC uint8 -> RGB NCHW float32 in [0, 1]
+        batch = np.stack(images)[..., ::-1].transpose(0, 3, 1, 2)
+        return np.ascontiguousarray(batch, dtype=np.float32) / 255.0
+
+    # --- INFERENCE ---
+
+    def detect(self, frames, profile: DetectionProfile = DEFAULT_PROFILE, metrics=NULL_METRICS):
+        input_size = self._input_size(profile)
+
+        with metrics.timer("inference"):
+            prepared = [self._letterbox(f, input_size) for f in frames]
+            images = [p[0] for p in prepared]
+
+            if self.dynamic_batch:
+                preds, protos = self.session.run(None, {self.input_name: self._blob(images)})
+            else:
+                outputs = [self.session.run(None, {self.input_name: self._blob([img])}) for img in images]
+                preds = np.concatenate([o[0] for o in outputs])
+                protos = np.concatenate([o[1] for o in outputs])
+
+        with metrics.timer("masks"):
+            return [
+                self._decode(preds[i], protos[i], frame.shape, gain, pad, input_size, profile)
+                for i, (frame, (_, gain, pad)) in enumerate(zip(frames, prepared))
+            ]
+
+    # --- POST-PROCESSING ---
+
+    def _decode(self, pred, protos, frame_shape, gain, pad, input_size, profile):
+        """pred: (4 + classes + mask_dim, anchors); protos: (mask_dim, mh, mw)."""
+        mask_dim = protos.shape[0]
+        # Only the profile's classes are decoded (banana by default)
+        class_scores = pred[[4 + c for c in profile.classes]]
+        scores = class_scores.max(axis=0)
+        candidates = np.flatnonzero(scores > profile.conf)
+        if len(candidates) == 0:
+            return []
+
+        cx, cy, w, h = pred[:4, candidates]
+        scores = scores[candidates]
+        coeffs = pred[-mask_dim:, candidates].T
+
+        # Banana-only NMS in letterbox space
+        boxes_xywh = np.stack([cx - w / 2, cy - h / 2, w, h], axis=1)
+        keep = cv2.dnn.NMSBoxes(boxes_xywh.tolist(), scores.tolist(), profile.conf, profile.iou)
+        keep = np.asarray(keep, dtype=int).reshape(-1)[:profile.max_det]
+
+        in_h, in_w = input_size
+        mh, mw = protos.shape[1:]
+        fh, fw = frame_shape[:2]
+        pad_x, pad_y = pad
+
+        bananas = []
+        for k in keep:
+            lx0, ly0, bw, bh = boxes_xywh[k]
+            lx1, ly1 = lx0 + bw, ly0 + bh
+
+            # Letterbox -> frame coordinates
+            bbox = [
+                float(np.clip((lx0 - pad_x) / gain, 0, fw)),
+                float(np.clip((ly0 - pad_y) / gain, 0, fh)),
+                float(np.clip((lx1 - pad_x) / gain, 0, fw)),
+                float(np.clip((ly1 - pad_y) / gain, 0, fh)),
+            ]
+            x0, y0, x1, y1 = crop_bounds(bbox, frame_shape)
+            if x1 <= x0 or y1 <= y0:
+                continue
+
+            # Prototype window covering the bbox; mask coefficients only applied there
+            sx, sy = mw / in_w, mh / in_h
+            px0 = min(max(int(np.floor((x0 * gain + pad_x) * sx)), 0), mw - 1)
+            py0 = min(max(int(np.floor((y0 * gain + pad_y) * sy)), 0), mh - 1)
+            px1 = min(max(int(np.ceil((x1 * gain + pad_x) * sx)), px0 + 1), mw)
+            py1 = min(max(int(np.ceil((y1 * gain + pad_y) * sy)), py0 + 1), mh)
+
+            window = protos[:, py0:py1, px0:px1]
+            logits = coeffs[k] @ window.reshape(mask_dim, -1)
+            logits = logits.reshape(py1 - py0, px1 - px0).astype(np.float32)
+
+            # Upsample the logits onto the bbox's frame pixels; sigmoid > 0.5 <=> logit > 0
+            crop = resample_window(logits, (x0, y0, x1, y1), (px0, py0), gain, pad,
+                                   cell=(sx, sy), interpolation=cv2.INTER_LINEAR) > 0
+
+            bananas.append({
+                "bbox": bbox,
+                "confidence": float(scores[k]),
+                "mask": crop,
+                "offset": (x0, y0)
+            })
+
+        return bananas
@@ -1,39 +1,232 @@
+import logging
+
+import numpy as np
+
 from src.detect import BananaDetector
-from src.geometry import estimate_length
-from src.color import analyze_color
+from src.geometry import measure_banana
+from src.color import analyze_colors, classify_mean_hsv
 from src.quality import estimate_shelf_life, quality_score
+from src.motion import MotionGate
+from src.tracking import BananaTracker
+from src.instrumentation import NULL_METRICS
+from src.calibration import CameraCalibration, load_calibration
+from src import rle
+
+
+class InspectionStream:
+    """
+    Per-camera state for continuous inspection: motion gate + fruit tracker,
+    and the camera's own calibration (None = uncalibrated geometry.PX_TO_CM).
+    """
+
+    def __init__(self, gate: MotionGate = None, tracker: BananaTracker = None,
+                 calibration: CameraCalibration = None):
+        self.gate = gate or MotionGate()
+        self.tracker = tracker or BananaTracker()
+        self.calibration = calibration
+        self.frames_seen = 0
+        self.frames_inspected = 0
+        self.bananas_counted = 0
 
 
 class BananaInspectionPipeline:
-    def __init__(self):
-        self.detector = BananaDetector()
+    def __init__(self, profile=None, metrics=None, calibration=None, detector=None):
+        # profile: DetectionProfile or preset name (see src.detect.PROFILES)
+        # metrics: src.instrumentation.Metrics for per-stage timings (off by default)
+        # calibration: CameraCalibration or station name (data/calibration/<station>.json);
+        #              None falls back to BANANAI_CAMERA_STATION, then to geometry.PX_TO_CM
+        # detector: a prebuilt BananaDetector (e.g. a worker's private model copy)
+        if calibration is None:
+            from src.config.config import Config
+            calibration = Config.CAMERA_STATION
+        if calibration is not None and not isinstance(calibration, CameraCalibration):
+            calibration = load_calibration(calibration)
+        self.calibration = calibration
+
+        self.metrics = metrics or NULL_METRICS
+        self.detector = detector or BananaDetector(profile=profile, metrics=self.metrics)
+        self.stream = InspectionStream(calibration=self.calibration)
+        self.logger = logging.getLogger("BananaInspectionPipeline")
 
     def process_frame(self, frame):
-        bananas = self.detector.detect_frame(frame)
-        print(f"[PIPELINE] Detected {len(bananas)} bananas")
+        with self.metrics.timer("frame"):
+            bananas = self.detector.detect_frame(frame)
+            results = self._measure(frame, bananas, self.calibration)
+        self.metrics.maybe_export()
+        return results
 
-        results = []
+    def process_frames(self, frames, batch_size: int = 8):
+        """
+        Batched variant of process_frame: one forward pass per chunk of frames.
+        Returns a list of result lists, aligned with the input frames.
+        """
+        frames = list(frames)
+        detections = self.detector.detect_batch(frames, batch_size=batch_size)
+        results = [self._measure(frame, bananas, self.calibration) for frame, bananas in zip(frames, detections)]
+        self.metrics.maybe_export()
+        return results
+
+    def process_stream_frame(self, frame, stream: InspectionStream = None):
+        """
+        Continuous-stream mode: call on every camera frame.
+        YOLO only runs when the motion gate fires. Measurements are tracked
+        across frames and each fruit is reported once, as a fused record,
+        when its track ends.
+        """
+        stream = stream or self.stream
+        stream.frames_seen += 1
+
+        fused = []
+        if stream.gate.should_inspect(frame):
+            stream.frames_inspected += 1
+            self.metrics.incr("frames_gated_in")
+            bananas = self.detector.detect_frame(frame)
+            measurements = self._measure(frame, bananas, stream.calibration)
+            fused = self._emit_tracks(stream.tracker.observe(measurements), stream)
+
+        self.metrics.maybe_export()
+        return fused
+
+    def flush_stream(self, stream: InspectionStream = None):
+        """Ends all live tracks (e.g. at shutdown) and returns their fused records."""
+        stream = stream or self.stream
+        return self._emit_tracks(stream.tracker.flush(), stream)
+
+    def _emit_tracks(self, ended, stream: InspectionStream):
+        fused = [fuse_track(track_id, observations) for track_id, observations in ended]
+        stream.bananas_counted += len(fused)
+        self.metrics.incr("tracks_fused", len(fused))
+        return fused
+
+    def _measure(self, frame, bananas, calibration):
+        # calibration is the caller's (pipeline or stream), never inherited:
+        # None means geometry.PX_TO_CM, not some other camera's profile
+        metrics = self.metrics
+        metrics.incr("frames")
+        metrics.incr("bananas_detected", len(bananas))
+        self.logger.info(f"[PIPELINE] Detected {len(bananas)} bananas")
 
-        for b in bananas:
-            length = estimate_length(b["mask"])
-            print(f"[PIPELINE] Estimated length: {length}")
+        measured = []
 
-            if length is None:
-                print("[PIPELINE] ❌ Length invalid")
-                continue
+        with metrics.timer("geometry"):
+            for b in bananas:
+                geometry = measure_banana(b["mask"], offset=b["offset"], calibration=calibration)
+                length = geometry["length_cm"] if geometry else None
+                self.logger.debug(f"[PIPELINE] Estimated length: {length}")
 
-            color = analyze_color(frame, b["mask"])
-            shelf = estimate_shelf_life(color["ripeness"])
-            quality = quality_score(length, b["confidence"], color["ripeness"])
+                if length is None:
+                    self.logger.debug("[PIPELINE] ❌ Length invalid")
+                    metrics.incr("lengths_rejected")
+                    continue
 
-            results.append({
-                "confidence": round(b["confidence"], 3),
-                "length_cm": length,
-                "ripeness": color["ripeness"],
-                "mean_hsv": color["mean_hsv"],
-                "shelf_life_days": shelf,
-                "quality_score": round(quality, 2),
-            })
+                measured.append((b, geometry))
 
-        print(f"[PIPELINE] Final results count: {len(results)}")
+        # One HSV conversion for every valid banana in the frame
+        with metrics.timer("color"):
+            colors = analyze_colors(
+                frame,
+                [b["mask"] for b, _ in measured],
+                [b["offset"] for b, _ in measured]
+            )
+
+        results = []
+
+        with metrics.timer("scoring"):
+            for (b, geometry), color in zip(measured, colors):
+                length = geometry["length_cm"]
+                shelf = estimate_shelf_life(color["ripeness"], color.get("dark_fraction", 0.0))
+                quality = quality_score(length, b["confidence"], color["ripeness"])
+
+                result = {
+                    "bbox": [round(v, 1) for v in b["bbox"]],
+                    "confidence": round(b["confidence"], 3),
+                    "length_cm": length,
+                    "curvature": geometry["curvature"],
+                    "max_width_cm": geometry["max_width_cm"],
+                    "ripeness": color["ripeness"],
+                    "mean_hsv": color["mean_hsv"],
+                    "hue_hist": color["hue_hist"],
+                    "sat_p": color["sat_p"],
+                    "val_p": color["val_p"],
+                    "dark_fraction": color["dark_fraction"],
+                    "shelf_life_days": shelf,
+                    "quality_score": round(quality, 2),
+                    # Crop mask as COCO RLE (src.rle): audit trail + re-grading without YOLO
+                    "mask": rle.encode(b["mask"], b["offset"]),
+                }
+                results.append(result)
+
+        metrics.incr("bananas_measured", len(results))
+        self.logger.info(f"[PIPELINE] Final results count: {len(results)}")
         return results
+
+
+def fuse_track(track_id: int, observations: list) -> dict:
+    """
+    Collapses one fruit's per-frame measurements into a single record.
+    Length, shape and color are confidence-weighted means; ripeness, shelf life
+    and quality are re-graded from the fused values.
+    """
+    weights = np.array([max(o["confidence"], 1e-3) for o in observations])
+
+    def fused(key):
+        return float(np.average([o[key] for o in observations], weights=weights))
+
+    def fused_array(key):
+        return np.average([o[key] for o in observations], axis=0, weights=weights)
+
+    mean_hsv = fused_array("mean_hsv")
+    ripeness = classify_mean_hsv(mean_hsv)["ripeness"]
+    dark_fraction = round(fused("dark_fraction"), 4)
+    confidence = float(np.mean(weights))
+    length = round(fused("length_cm"), 2)
+
+    return {
+        "track_id": track_id,
+        "frames": len(observations),
+        "bbox": observations[-1]["bbox"],
+        "confidence": round(confidence, 3),
+        "length_cm": length,
+        "curvature": round(fused("curvature"), 4),
+        "max_width_cm": round(fused("max_width_cm"), 2),
+        "ripeness": ripeness,
+        "mean_hsv": mean_hsv.tolist(),
+        "hue_hist": np.round(fused_array("hue_hist"), 3).tolist(),
+        "sat_p": np.round(fused_array("sat_p")).astype(int).tolist(),
+        "val_p": np.round(fused_array("val_p")).astype(int).tolist(),
+        "dark_fraction": dark_fraction,
+        "shelf_life_days": estimate_shelf_life(ripeness, dark_fraction),
+        "quality_score": round(quality_score(length, confidence, ripeness), 2),
+        "mask": observations[-1].get("mask"),
+    }
+
+
+def regrade_detection(det: dict, calibration: CameraCalibration = None, px_to_cm: float = None) -> dict:
+    """
+    Re-grades a stored result from its RLE mask and color stats, without the
+    image or YOLO: geometry is re-measured (new calibration / px_to_cm),
+    ripeness, shelf life and quality are re-derived.
+    Returns None if the stored mask no longer yields a valid length.
+    """
+    mask_rle = det.get("mask")
+    if not mask_rle:
+        return None
+    geometry = measure_banana(rle.decode(mask_rle), px_to_cm=px_to_cm,
+                              offset=rle.offset(mask_rle), calibration=calibration)
+    if geometry is None:
+        return None
+
+    ripeness = classify_mean_hsv(det["mean_hsv"])["ripeness"]
+    dark_fraction = det.get("dark_fraction", 0.0)
+    length = geometry["length_cm"]
+
+    regraded = dict(det)
+    regraded.update({
+        "length_cm": length,
+        "curvature": geometry["curvature"],
+        "max_width_cm": geometry["max_width_cm"],
+        "ripeness": ripeness,
+        "shelf_life_days": estimate_shelf_life(ripeness, dark_fraction),
+        "quality_score": round(quality_score(length, det["confidence"], ripeness), 2),
+    })
+    return regraded
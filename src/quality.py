@@ -1,10 +1,16 @@
-def estimate_shelf_life(ripeness: str) -> int:
-    """Professional Logistics Shelf-Life Mapping."""
-    return {
+def estimate_shelf_life(ripeness: str, dark_fraction: float = 0.0) -> int:
+    """
+    Professional Logistics Shelf-Life Mapping.
+    dark_fraction (brown-spot area share, from src.color) shortens the base
+    figure: a peel that is 25% spotted has half the days left.
+    """
+    days = {
         "unripe": 21,    # High export potential
         "mid-ripe": 10,  # Regional transit
         "ripe": 4        # Immediate local consumption
     }.get(ripeness, 0)
+    spotted = min(max(dark_fraction or 0.0, 0.0), 0.5)
+    return int(round(days * (1 - 2 * spotted)))
 
 def quality_score(length: float, confidence: float, ripeness: str) -> float:
     """
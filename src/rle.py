@@ -0,0 +1,113 @@
+"""
+COCO-style run-length mask codec.
+
+A mask is flattened column-major and stored as alternating run lengths,
+starting with a (possibly empty) run of zeros. Counts are serialized with
+COCO's compact ASCII scheme, so encoded masks are a few hundred bytes per
+banana and drop straight into JSON.
+
+Encoded masks are dicts:
+    {"size": [h, w], "counts": "<ascii>", "offset": [x0, y0]}
+where offset places a bbox-crop mask in the frame (see src.detect.crop_mask).
+"""
+import numpy as np
+
+
+def _runs(mask: np.ndarray) -> np.ndarray:
+    flat = np.asarray(mask, dtype=bool).ravel(order="F")
+    if flat.size == 0:
+        return np.zeros(0, dtype=np.int64)
+    change = np.flatnonzero(flat[1:] != flat[:-1]) + 1
+    bounds = np.concatenate([[0], change, [flat.size]])
+    runs = np.diff(bounds)
+    if flat[0]:
+        runs = np.concatenate([[0], runs])  # Counts always start with zeros
+    return runs
+
+
+def _to_string(counts) -> str:
+    """COCO rleToString: 5-bit groups, delta-coded against counts[i - 2]."""
+    out = []
+    counts = [int(c) for c in counts]
+    for i, x in enumerate(counts):
+        if i > 2:
+            x -= counts[i - 2]
+        more = True
+        while more:
+            c = x & 0x1F
+            x >>= 5
+            more = (x != -1) if (c & 0x10) else (x != 0)
+            if more:
+                c |= 0x20
+            out.append(chr(c + 48))
+    return "".join(out)
+
+
+def _from_string(s: str) -> np.ndarray:
+    """COCO rleFrString."""
+    counts = []
+    p = 0
+    while p < len(s):
+        x, k, more = 0, 0, True
+        while more:
+            c = ord(s[p]) - 48
+            x |= (c & 0x1F) << (5 * k)
+            more = bool(c & 0x20)
+            p += 1
+            k += 1
+            if not more and (c & 0x10):
+                x |= -1 << (5 * k)
+        if len(counts) > 2:
+            x += counts[-2]
+        counts.append(x)
+    return np.asarray(counts, dtype=np.int64)
+
+
+def encode(mask: np.ndarray, offset=(0, 0)) -> dict:
+    h, w = mask.shape[:2]
+    return {
+        "size": [int(h), int(w)],
+        "counts": _to_string(_runs(mask)),
+        "offset": [int(offset[0]), int(offset[1])],
+    }
+
+
+def decode(rle: dict) -> np.ndarray:
+    """Crop-sized bool mask; place it in the frame with rle["offset"]."""
+    h, w = rle["size"]
+    counts = _from_string(rle["counts"])
+    values = np.zeros(len(counts), dtype=bool)
+    values[1::2] = True
+    flat = np.repeat(values, counts)
+    return flat.reshape((h, w), order="F") if flat.size == h * w else np.zeros((h, w), dtype=bool)
+
+
+def offset(rle: dict):
+    return tuple(rle.get("offset", (0, 0)))
+
+
+def area(rle: dict) -> int:
+    return int(_from_string(rle["counts"])[1::2].sum())
+
+
+def bbox(rle: dict):
+    """Tight [x1, y1, x2, y2] (exclusive max) in frame pixels, straight from the runs."""
+    h, _ = rle["size"]
+    counts = _from_string(rle["counts"])
+    ends = np.cumsum(counts)
+    starts = ends - counts
+    fg = np.flatnonzero((np.arange(len(counts)) % 2 == 1) & (counts > 0))
+    if not len(fg):
+        return None
+    first, last = starts[fg], ends[fg] - 1
+
+    col0, col1 = first // h, last // h
+    # A run spanning a column boundary covers rows 0..h-1 in between
+    row_lo = np.where(col0 == col1, first % h, 0)
+    row_hi = np.where(col0 == col1, last % h, h - 1)
+
+    x0, y0 = offset(rle)
+    return [
+        int(x0 + col0.min()), int(y0 + row_lo.min()),
+        int(x0 + col1.max() + 1), int(y0 + row_hi.max() + 1),
+    ]
@@ -48,6 +48,6 @@ class InventoryManager:
         report = []
         if total_kg < 1000:
             report.append("⚠️  CRITICAL: Warehouse total below 1,000kg!")
-        if len(inventory.batches) < 3:
+        if len(inventory) < 3:
             report.append("📢  ALERT: Limited batch diversity. Resupply needed.")
         return report
\ No newline at end of file
@@ -22,7 +22,7 @@ class OrderManager:
             (b for b in batches if b.remaining_weight_g >= weight_kg * 1000),
             None
         )
-        if not batch:
+        if batch is None:
             raise ValueError("No batch can fulfill this order")
 
         batch_info = batch.to_dict()
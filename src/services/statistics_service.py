@@ -1,5 +1,84 @@
 import math
 
+
+class RunningStats:
+    """
+    Streaming count / mean / variance / min / max (Welford's algorithm).
+    O(1) per value and O(1) to describe; describe() matches StatisticsService.describe.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def push(self, x: float):
+        x = float(x)
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+
+    def merge(self, other: 'RunningStats'):
+        """Combines two partial aggregates (Chan et al.), e.g. two stations' batches."""
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def variance(self) -> float:
+        # Population variance, like StatisticsService.describe
+        return self.m2 / self.count if self.count else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    def describe(self) -> dict:
+        if not self.count:
+            return {}
+        return {
+            "mean": round(self.mean, 2),
+            "std": round(self.std, 2),
+            "min": round(self.min, 2),
+            "max": round(self.max, 2),
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "m2": self.m2,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'RunningStats':
+        stats = cls()
+        stats.count = int(data.get("count", 0))
+        if stats.count:
+            stats.mean = float(data["mean"])
+            stats.m2 = float(data["m2"])
+            stats.min = float(data["min"])
+            stats.max = float(data["max"])
+        return stats
+
+
 class StatisticsService:
 
     @staticmethod
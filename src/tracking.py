@@ -0,0 +1,116 @@
+import numpy as np
+
+
+def iou_matrix(boxes_a, boxes_b) -> np.ndarray:
+    """Pairwise IoU between two lists of [x1, y1, x2, y2] boxes."""
+    a = np.asarray(boxes_a, dtype=float).reshape(-1, 4)
+    b = np.asarray(boxes_b, dtype=float).reshape(-1, 4)
+
+    ix1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    iy1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    ix2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    iy2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(ix2 - ix1, 0, None) * np.clip(iy2 - iy1, 0, None)
+
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+
+    return np.where(union > 0, inter / np.maximum(union, 1e-9), 0.0)
+
+
+class IoUTracker:
+    """
+    Greedy IoU association across consecutive inspected frames.
+    Each detection is tagged with a track id; a fruit seen again keeps its id,
+    so callers can count and measure every banana exactly once.
+    """
+
+    def __init__(self, iou_threshold: float = 0.3, max_missed: int = 3):
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+
+        self._next_id = 1
+        self._boxes = {}    # track_id -> last bbox
+        self._missed = {}   # track_id -> consecutive updates without a match
+        self.last_ended = []  # track ids retired by the latest update()
+
+    def update(self, bboxes) -> list:
+        """
+        Associates this frame's boxes with live tracks.
+        Returns [(track_id, is_new), ...] aligned with bboxes.
+        """
+        track_ids = list(self._boxes)
+        assigned = [None] * len(bboxes)
+        used = set()
+
+        if track_ids and len(bboxes):
+            ious = iou_matrix(bboxes, [self._boxes[t] for t in track_ids])
+            # Best pairs first; each track and detection used at most once
+            for flat in np.argsort(ious, axis=None)[::-1]:
+                d, t = divmod(int(flat), len(track_ids))
+                if ious[d, t] < self.iou_threshold:
+                    break
+                if assigned[d] is None and track_ids[t] not in used:
+                    assigned[d] = track_ids[t]
+                    used.add(track_ids[t])
+
+        matches = []
+        for d, box in enumerate(bboxes):
+            is_new = assigned[d] is None
+            if is_new:
+                assigned[d] = self._next_id
+                self._next_id += 1
+            self._boxes[assigned[d]] = list(box)
+            self._missed[assigned[d]] = 0
+            matches.append((assigned[d], is_new))
+
+        self.last_ended = self._expire(set(assigned))
+        return matches
+
+    def _expire(self, seen: set) -> list:
+        ended = []
+        for track_id in list(self._boxes):
+            if track_id in seen:
+                continue
+            self._missed[track_id] += 1
+            if self._missed[track_id] > self.max_missed:
+                del self._boxes[track_id]
+                del self._missed[track_id]
+                ended.append(track_id)
+        return ended
+
+    @property
+    def active_tracks(self) -> int:
+        return len(self._boxes)
+
+
+class BananaTracker(IoUTracker):
+    """
+    IoU tracker that keeps every per-frame measurement of a fruit until its
+    track ends, so the caller can fuse them into a single record.
+    """
+
+    def __init__(self, iou_threshold: float = 0.3, max_missed: int = 3):
+        super().__init__(iou_threshold, max_missed)
+        self._observations = {}  # track_id -> [measurement dicts]
+
+    def observe(self, measurements) -> list:
+        """
+        Adds this frame's measurements (dicts with a "bbox") to their tracks.
+        Returns [(track_id, observations), ...] for tracks that just ended.
+        """
+        matches = self.update([m["bbox"] for m in measurements])
+        for m, (track_id, _) in zip(measurements, matches):
+            m["track_id"] = track_id
+            self._observations.setdefault(track_id, []).append(m)
+
+        return [(t, self._observations.pop(t)) for t in self.last_ended if t in self._observations]
+
+    def flush(self) -> list:
+        """Ends every live track (e.g. at shutdown) and returns their observations."""
+        ended = list(self._observations.items())
+        self._observations.clear()
+        self._boxes.clear()
+        self._missed.clear()
+        return ended
@@ -0,0 +1,170 @@
+import json
+import random
+import statistics
+
+import pytest
+
+from src.models.banana import Banana
+from src.models.banana_batch import SCHEMA_VERSION, BananaBatch
+from src.models.banana_sample import BananaSample
+
+RIPENESS = ("unripe", "mid-ripe", "ripe")
+
+
+def _fed_batch(n=40, seed=0):
+    """A batch fed from the line, with the pipeline's per-detection shelf life."""
+    rng = random.Random(seed)
+    batch = BananaBatch("Cavendish", batch_id="b1", total_weight_kg=250.0, received_date=1.7e9)
+    for _ in range(n):
+        banana = Banana(rng.uniform(12, 26), rng.choice(RIPENESS), rng.uniform(0.5, 0.99),
+                        (rng.uniform(15, 45), rng.uniform(60, 220), rng.uniform(80, 230)))
+        batch.add_sample(BananaSample(banana, 1.7e9), rng.randint(2, 9))
+    return batch
+
+
+def _recompute(batch, lives):
+    """Aggregates straight from batch.samples, the way a full rescan would get them."""
+    qualities = [s.banana.quality_index() for s in batch.samples]
+    counts = {}
+    for s in batch.samples:
+        counts[s.banana.ripeness] = counts.get(s.banana.ripeness, 0) + 1
+    return {
+        "avg_quality": round(statistics.fmean(qualities), 2),
+        "quality_variance": round(statistics.pvariance(qualities), 4),
+        "min_shelf_life_days": min(lives),
+        "ripeness_counts": counts,
+    }
+
+
+def _pick(stats):
+    return {k: stats[k] for k in ("avg_quality", "quality_variance", "min_shelf_life_days", "ripeness_counts")}
+
+
+# --- RUNNING AGGREGATES ---
+
+@pytest.mark.parametrize("keep_aggregates", [True, False])
+def test_add_sample_after_load_matches_full_recompute(keep_aggregates):
+    rng = random.Random(1)
+    batch = _fed_batch()
+    lives = [batch.stats()["min_shelf_life_days"]]
+
+    data = json.loads(json.dumps(batch.to_dict()))
+    if not keep_aggregates:
+        for key in ("quality", "ripeness_counts", "min_shelf_life_days"):
+            data["computed_stats"].pop(key)
+    loaded = BananaBatch.from_dict(data)
+
+    for _ in range(15):
+        life = rng.randint(1, 9)
+        lives.append(life)
+        loaded.add_sample(BananaSample(Banana(rng.uniform(12, 26), rng.choice(RIPENESS), 0.8), 1.7e9), life)
+
+    expected = _recompute(loaded, lives)
+    assert _pick(loaded.stats()) == expected
+    assert loaded.average_quality() == expected["avg_quality"]
+    assert loaded.estimated_shelf_life_days() == expected["min_shelf_life_days"]
+    assert "locked" not in loaded.stats()  # New samples unlock the saved stats
+
+
+def test_stats_snapshot_is_one_source_for_legacy_files():
+    # Legacy file: raw detection samples carrying quality_score, stats locked by an older grader
+    data = {
+        "batch_id": "old", "banana_type": "Cavendish", "total_weight_kg": 50, "remaining_weight_kg": 50,
+        "computed_stats": {"avg_quality": 0.6, "shelf_life_days": 5},
+        "samples": [{"banana": {"quality_score": 0.7, "ripeness": "ripe", "shelf_life_days": 3}},
+                    {"banana": {"quality_score": 0.7, "ripeness": "ripe", "shelf_life_days": 4}}],
+    }
+    batch = BananaBatch.from_dict(data)
+    stats = batch.stats()
+
+    assert stats["avg_quality"] == stats["quality"]["mean"] == 0.7
+    assert stats["shelf_life_days"] == stats["min_shelf_life_days"] == 3
+    assert stats["locked"] == {"avg_quality": 0.6, "shelf_life_days": 5}
+    # Inventory keeps selling under the locked values
+    assert batch.average_quality() == 0.6
+    assert batch.estimated_shelf_life_days() == 5
+
+
+def test_empty_batch_stats():
+    stats = BananaBatch("Cavendish").stats()
+    assert stats["samples"] == 0 and stats["avg_quality"] == 0.0
+    assert stats["shelf_life_days"] == 7 and stats["min_shelf_life_days"] is None
+    assert "locked" not in stats
+
+
+# --- SCHEMA-VERSIONED DECODER ---
+
+def test_v2_round_trip():
+    batch = _fed_batch()
+    data = json.loads(json.dumps(batch.to_dict()))
+    assert data["schema_version"] == SCHEMA_VERSION == 2
+
+    loaded = BananaBatch.from_dict(data)
+    assert loaded.to_dict() == data
+    stats = loaded.stats()
+    assert stats.pop("locked") == {"avg_quality": data["computed_stats"]["avg_quality"],
+                                   "shelf_life_days": data["computed_stats"]["shelf_life_days"]}
+    assert stats == batch.stats()
+    assert all(isinstance(s.banana, Banana) for s in loaded.samples)
+
+
+def test_v1_unversioned_file_reads_the_same():
+    data = json.loads(json.dumps(_fed_batch().to_dict()))
+    data.pop("schema_version")
+    for key in ("quality", "ripeness_counts", "min_shelf_life_days"):
+        data["computed_stats"].pop(key)
+
+    loaded = BananaBatch.from_dict(data)
+    assert loaded.average_quality() == data["computed_stats"]["avg_quality"]
+    assert loaded.estimated_shelf_life_days() == data["computed_stats"]["shelf_life_days"]
+    assert loaded.to_dict()["samples"] == data["samples"]
+    assert loaded.to_dict()["schema_version"] == SCHEMA_VERSION
+
+
+def test_newer_schema_is_rejected():
+    data = _fed_batch(n=2).to_dict()
+    data["schema_version"] = SCHEMA_VERSION + 1
+    with pytest.raises(ValueError):
+        BananaBatch.from_dict(data)
+
+
+def test_computed_stats_are_locked_without_regrading(monkeypatch):
+    data = json.loads(json.dumps(_fed_batch().to_dict()))
+    data["computed_stats"].update({"avg_quality": 0.11, "shelf_life_days": 2})
+    loaded = BananaBatch.from_dict(data)
+
+    # Loading and reading the locked stats never touches the samples
+    monkeypatch.setattr(BananaBatch, "_aggregate", lambda *a: pytest.fail("samples were re-graded"))
+    assert loaded.average_quality() == 0.11
+    assert loaded.estimated_shelf_life_days() == 2
+
+
+def test_saved_aggregates_skip_the_rebuild(monkeypatch):
+    data = json.loads(json.dumps(_fed_batch().to_dict()))
+    monkeypatch.setattr(BananaBatch, "_aggregate", lambda *a: pytest.fail("samples were re-aggregated"))
+    stats = BananaBatch.from_dict(data).stats()
+    assert stats["samples"] == 40
+    assert stats["avg_quality"] == data["computed_stats"]["avg_quality"]
+
+
+def test_missing_computed_stats_fall_back_to_samples():
+    data = json.loads(json.dumps(_fed_batch().to_dict()))
+    expected = _recompute(BananaBatch.from_dict(data), [data["computed_stats"]["min_shelf_life_days"]])
+    data.pop("computed_stats")
+
+    loaded = BananaBatch.from_dict(data)
+    assert loaded.average_quality() == expected["avg_quality"]
+    assert loaded.estimated_shelf_life_days() == 7  # Bananas don't store shelf life
+
+
+def test_unknown_sample_shapes_are_kept_verbatim():
+    raw = {"bbox": [1, 2, 3, 4], "quality_score": 0.3}
+    odd_banana = {"banana": {"length_cm": 20.0, "ripeness": "ripe", "confidence": 0.9, "colour": "yellow"},
+                  "timestamp": 1.0}
+    data = {"batch_id": "x", "samples": [raw, odd_banana]}
+
+    loaded = BananaBatch.from_dict(data)
+    assert loaded.samples[0] is raw
+    assert loaded.samples[1].banana == odd_banana["banana"]  # Extra key: not a serialized Banana
+    assert loaded.to_dict()["samples"] == [raw, odd_banana]
+    assert loaded.average_quality() == 0.0  # Neither carries a quality under a known key path
@@ -0,0 +1,68 @@
+import json
+
+import batch_manager
+from src.capture_store import CaptureSegmentWriter, HEADER
+
+
+def _detection(length_cm=18.0):
+    return {"bbox": [0, 0, 10, 10], "confidence": 0.9, "length_cm": length_cm, "ripeness": "ripe",
+            "mean_hsv": [30.0, 120.0, 150.0], "shelf_life_days": 4, "quality_score": 0.6}
+
+
+def _saved_batches(root):
+    return [json.loads(p.read_text()) for p in (root / "data" / "batches").glob("*.json")]
+
+
+def test_one_scale_reading_is_one_batch(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # BatchRepository writes under the cwd
+    results = tmp_path / "results"
+    writer = CaptureSegmentWriter(results)
+    for i in range(6):
+        writer.append(1000 + i * 10, None, [_detection()])
+    writer.close()
+    weights = tmp_path / "scale.log"
+    weights.write_text("1040 120.0\n")
+
+    assert batch_manager.bulk_import(weights, results, workers=1) == 1
+    batches = _saved_batches(tmp_path)
+    assert len(batches) == 1
+    assert batches[0]["total_weight_kg"] == 120.0
+    assert len(batches[0]["samples"]) == 6
+
+    # A later capture matching the same reading joins that batch
+    writer = CaptureSegmentWriter(results)
+    writer.append(1100, None, [_detection()])
+    writer.close()
+    assert batch_manager.bulk_import(weights, results, workers=1) == 0
+    batches = _saved_batches(tmp_path)
+    assert len(batches) == 1
+    assert sum(b["total_weight_kg"] for b in batches) == 120.0
+    assert len(batches[0]["samples"]) == 7
+
+
+def test_weights_row_per_segment_is_one_batch(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    results = tmp_path / "results"
+    writer = CaptureSegmentWriter(results)
+    for i in range(3):
+        writer.append(1000 + i, None, [_detection()])
+    writer.close()
+    weights = tmp_path / "weights.csv"
+    weights.write_text(f"source,weight_kg\n{writer.path.name},80\n")
+
+    assert batch_manager.bulk_import(weights, results, workers=1) == 1
+    assert [b["total_weight_kg"] for b in _saved_batches(tmp_path)] == [80.0]
+
+
+def test_scale_log_with_space_separated_iso_times(tmp_path):
+    log = tmp_path / "scale.log"
+    log.write_text("2026-10-17 10:00:00 12.5\nSTABLE kg\n2026-10-17T10:05:00 13.0\n")
+    _, timeline = batch_manager.load_weights(log)
+    assert [kg for _, kg in timeline] == [12.5, 13.0]
+    assert timeline[1][0] - timeline[0][0] == 300
+
+
+def test_segment_cut_off_inside_header_is_skipped(tmp_path):
+    path = tmp_path / "captures_1.seg"
+    path.write_bytes(b"BNSEG"[:HEADER.size - 1])
+    assert batch_manager._parse_capture_file(str(path), path.name) == []
@@ -0,0 +1,135 @@
+import json
+
+import cv2
+import numpy as np
+import pytest
+
+from src import rle
+from src.capture_store import (
+    DETECTION, MASK_PNG, MASK_SIZE, TRAILER, CaptureSegmentReader, CaptureSegmentWriter,
+    _decode_mask, iter_capture_dir, iter_segments,
+)
+
+
+def _detection(i=0, mask=True):
+    crop = np.zeros((12, 20), dtype=bool)
+    crop[3:9, 2:18] = True
+    det = {
+        "bbox": [10.0 + i, 20.0, 30.0 + i, 32.0], "confidence": 0.9, "length_cm": 18.5,
+        "curvature": 0.01, "max_width_cm": 3.2, "ripeness": "ripe", "mean_hsv": [30.0, 120.0, 150.0],
+        "hue_hist": [0.5, 0.5] + [0.0] * 16, "sat_p": [100, 120, 140], "val_p": [90, 150, 200],
+        "dark_fraction": 0.05, "shelf_life_days": 4, "quality_score": 0.62, "track_id": i, "frames": 3,
+    }
+    if mask:
+        det["mask"] = rle.encode(crop, offset=(10 + i, 20))
+    return det
+
+
+def _write(directory, n=3, close=True):
+    writer = CaptureSegmentWriter(directory)
+    frame = np.full((64, 64, 3), 127, dtype=np.uint8)
+    for i in range(n):
+        writer.append(1000 + i, frame, [_detection(i), _detection(i + 10, mask=False)] if i % 2 == 0 else [])
+    if close:
+        writer.close()
+    else:
+        writer.flush()
+    return writer
+
+
+def _check(reader, n=3):
+    assert len(reader) == n
+    assert reader.timestamps() == [1000 + i for i in range(n)]
+    for i, capture in enumerate(reader.iter_captures(masks=True, crops=True)):
+        assert capture["timestamp"] == 1000 + i
+        if i % 2:
+            assert capture["status"] == "NO_VALID_DETECTION" and capture["detections"] == []
+            continue
+        with_mask, without_mask = capture["detections"]
+        expected = _detection(i)
+        assert with_mask["ripeness"] == "ripe"
+        assert with_mask["length_cm"] == expected["length_cm"]
+        assert with_mask["track_id"] == i and with_mask["frames"] == 3
+        assert with_mask["mask"] == expected["mask"]
+        assert with_mask["crop"].shape[:2] == (12, 20)
+        assert without_mask["mask"] is None
+
+
+def test_closed_segment_round_trip(tmp_path):
+    writer = _write(tmp_path)
+    with CaptureSegmentReader(writer.path) as reader:
+        _check(reader)
+        # Masks and crops are only decoded on request
+        assert "mask" not in reader[0]["detections"][0] and "crop" not in reader[0]["detections"][0]
+
+
+def test_unclosed_segment_is_scanned(tmp_path):
+    writer = _write(tmp_path, close=False)
+    with CaptureSegmentReader(writer.path) as reader:
+        _check(reader)
+    writer.close()
+
+
+def test_torn_final_record_is_dropped(tmp_path):
+    writer = _write(tmp_path, close=False)
+    writer._file.close()
+    data = writer.path.read_bytes()
+    writer.path.write_bytes(data + data[-40:-5])  # Half a record appended by a dying writer
+    with CaptureSegmentReader(writer.path) as reader:
+        _check(reader)
+
+
+def test_segments_roll_over(tmp_path):
+    writer = CaptureSegmentWriter(tmp_path, max_captures=2)
+    for i in range(5):
+        writer.append(1000 + i, None, [_detection(i)])
+    writer.close()
+    assert len(list(tmp_path.glob("captures_*.seg"))) == 3
+    assert [c["timestamp"] for _, c in iter_segments(tmp_path)] == [1000 + i for i in range(5)]
+
+
+def test_footer_is_used_when_present(tmp_path):
+    writer = _write(tmp_path)
+    _, count, magic = TRAILER.unpack_from(writer.path.read_bytes()[-TRAILER.size:])
+    assert (count, magic) == (3, b"BIDX")
+
+
+def test_legacy_png_masks_decode_to_rle():
+    mask = np.zeros((9, 14), dtype=bool)
+    mask[2:7, 3:11] = True
+    ok, png = cv2.imencode(".png", mask.astype(np.uint8) * 255)
+    assert ok
+    decoded = _decode_mask(MASK_PNG, png.tobytes(), (5, 6))
+    assert decoded == rle.encode(mask, (5, 6))
+
+
+def test_rle_blob_layout():
+    mask = rle.encode(np.eye(4, dtype=bool), offset=(1, 2))
+    blob = MASK_SIZE.pack(4, 4) + mask["counts"].encode("ascii")
+    assert _decode_mask(2, blob, (1, 2)) == mask
+
+
+def test_detection_struct_size():
+    assert DETECTION.size == 120
+
+
+def test_iter_capture_dir_mixes_segments_and_json(tmp_path):
+    _write(tmp_path)
+    legacy = {"timestamp": 900, "detections": [_detection(mask=False)], "status": "OK"}
+    (tmp_path / "banana_sample_900.json").write_text(json.dumps(legacy))
+    (tmp_path / "captures_1_empty.seg").write_bytes(b"")  # Created, never written
+
+    captures = list(iter_capture_dir(tmp_path))
+    sources = [source for source, _ in captures]
+    assert sources[-1] == "banana_sample_900.json"
+    assert [source.split("#")[1] for source in sources[:-1]] == ["0", "1", "2"]
+    assert captures[-1][1] == legacy
+    assert [c["timestamp"] for _, c in captures] == [1000, 1001, 1002, 900]
+
+
+@pytest.mark.parametrize("garbage", [b"NOTASEGMENTxxxxxxxx", b"BNSEG\x09" + b"\x00" * 10])
+def test_reader_rejects_foreign_files(tmp_path, garbage):
+    path = tmp_path / "captures_2.seg"
+    path.write_bytes(garbage)
+    with pytest.raises(ValueError):
+        CaptureSegmentReader(path)
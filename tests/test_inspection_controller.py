@@ -0,0 +1,67 @@
+import json
+
+from src.controller.inspection_controller import InspectionController
+
+
+def _result(i):
+    return {"length_cm": 15.0 + i % 7, "ripeness": ("unripe", "ripe")[i % 2], "confidence": 0.9,
+            "mean_hsv": [30.0, 120.0, 150.0], "shelf_life_days": 3 + i % 5}
+
+
+def _controller(tmp_path, every=10):
+    return InspectionController(station="line_a", checkpoint_dir=tmp_path / "ckpt", checkpoint_every=every)
+
+
+def test_checkpoint_appends_samples_and_keeps_header_small(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # BatchRepository writes under the cwd
+    controller = _controller(tmp_path)
+    for i in range(25):
+        controller.process_detection(_result(i))
+
+    header = json.loads(controller.checkpoint_path.read_text())
+    assert "samples" not in header["batch"]
+    assert header["samples_logged"] == 20
+    assert len(controller.sample_log_path.read_text().splitlines()) == 20
+
+
+def test_resume_rebuilds_batch_from_log(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    controller = _controller(tmp_path)
+    for i in range(23):
+        controller.process_detection(_result(i))
+    controller.checkpoint()
+    expected = controller.stats()
+
+    resumed = _controller(tmp_path)
+    assert len(resumed.current_batch) == 23
+    assert resumed.stats() == expected
+    assert resumed.current_batch.to_dict() == controller.current_batch.to_dict()
+
+    # Resumed batches keep appending where the log stopped
+    for i in range(23, 33):
+        resumed.process_detection(_result(i))
+    assert len(resumed.sample_log_path.read_text().splitlines()) == 33
+
+
+def test_resume_ignores_torn_log_tail(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    controller = _controller(tmp_path)
+    for i in range(10):
+        controller.process_detection(_result(i))
+    with open(controller.sample_log_path, "a") as f:
+        f.write('{"banana": {"length_')  # Crash mid-append, header never rewritten
+
+    resumed = _controller(tmp_path)
+    assert len(resumed.current_batch) == 10
+
+
+def test_finalize_removes_checkpoint_files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    controller = _controller(tmp_path)
+    for i in range(12):
+        controller.process_detection(_result(i))
+    controller.finalize_batch(100.0)
+
+    assert not controller.checkpoint_path.exists()
+    assert not controller.sample_log_path.exists()
+    assert len(controller.current_batch) == 0
@@ -0,0 +1,116 @@
+import random
+
+import pytest
+
+from src.models.banana_batch import BananaBatch
+from src.models.inventory import QUALITY_TIERS, Inventory, tier_min_quality
+
+
+def _batch(batch_id, quality, life, kg=100.0):
+    return BananaBatch.from_dict({
+        "batch_id": batch_id, "banana_type": "Cavendish", "received_date": 1.7e9,
+        "total_weight_kg": kg, "remaining_weight_kg": kg,
+        "computed_stats": {"avg_quality": quality, "shelf_life_days": life},
+    })
+
+
+def _legacy_recommendations(batches, transit_days, requested_tier):
+    """The full scan-and-sort get_recommendations the tier index replaced."""
+    min_q = tier_min_quality(requested_tier)
+    perfect, alternatives = [], []
+    for batch in batches:
+        life, avg_q = batch.estimated_shelf_life_days(), batch.average_quality()
+        if not (life >= transit_days if transit_days > 0 else life > 0):
+            continue
+        (perfect if avg_q >= min_q else alternatives).append(batch)
+    perfect.sort(key=lambda x: (x.average_quality(), x.estimated_shelf_life_days()), reverse=True)
+    alternatives.sort(key=lambda x: x.average_quality(), reverse=True)
+    return perfect, alternatives
+
+
+@pytest.fixture
+def stock():
+    rng = random.Random(7)
+    # Coarse values so ties (and tier boundaries) are common
+    return [_batch(f"b{i:03d}", rng.choice([0.2, 0.45, 0.5, 0.65, 0.8]), rng.randint(0, 9))
+            for i in range(200)]
+
+
+@pytest.mark.parametrize("tier", ["premium", "Standard", "e", "unknown"])
+@pytest.mark.parametrize("transit_days", [0, 1, 4, 9, 12])
+def test_recommendations_match_full_scan(stock, tier, transit_days):
+    inventory = Inventory()
+    inventory.reload(stock)
+    assert inventory.get_recommendations(500, transit_days, tier) == \
+        _legacy_recommendations(stock, transit_days, tier)
+
+
+def test_recommendations_follow_reservations(stock):
+    inventory = Inventory()
+    inventory.reload(stock)
+    for batch in stock[::3]:
+        inventory.reserve_stock(batch, batch.remaining_weight_kg)
+    live = [b for b in stock if b.remaining_weight_kg > 0]
+    assert inventory.get_recommendations(500, 2, "standard") == _legacy_recommendations(live, 2, "standard")
+
+
+def test_tier_min_quality_reads_the_tier_table():
+    assert [tier_min_quality(name) for name, _ in QUALITY_TIERS] == [q for _, q in QUALITY_TIERS]
+    assert tier_min_quality("P") == tier_min_quality("premium")
+    assert tier_min_quality("") == QUALITY_TIERS[-1][1]
+
+
+def _live_kg(inventory):
+    return round(sum(b.remaining_weight_kg for b in inventory.batches), 2)
+
+
+def test_total_tracks_partial_and_full_reservations(stock):
+    inventory = Inventory()
+    inventory.reload(stock)
+    rng = random.Random(3)
+    for batch in rng.sample(stock, 120):
+        amount = rng.choice([batch.remaining_weight_kg, 12.34, 0.01, 99.99])
+        inventory.reserve_stock(batch, amount)
+        assert inventory.get_total_stock_kg() == _live_kg(inventory)
+    # Failed reservations change nothing
+    before = inventory.get_total_stock_kg()
+    assert not inventory.reserve_stock(stock[0], 10_000)
+    assert inventory.get_total_stock_kg() == before
+
+
+def test_depleted_batches_are_evicted(stock):
+    inventory = Inventory()
+    inventory.reload(stock)
+    batch = next(b for b in stock if b.estimated_shelf_life_days() >= 2)
+    assert inventory.reserve_stock(batch, 40)
+    assert inventory.find_batch_by_id(batch.batch_id) is batch
+    assert inventory.reserve_stock(batch, batch.remaining_weight_kg)
+
+    assert inventory.find_batch_by_id(batch.batch_id) is None
+    assert len(inventory) == len(stock) - 1
+    perfect, alternatives = inventory.get_recommendations(10, 0, "economic")
+    assert batch not in perfect + alternatives
+    assert inventory.get_total_stock_kg() == _live_kg(inventory)
+
+
+def test_empty_batches_are_not_tracked():
+    inventory = Inventory()
+    inventory.add_batch(_batch("gone", 0.7, 5, kg=0.0))
+    assert len(inventory) == 0 and inventory.get_total_stock_kg() == 0.0
+
+
+def test_duplicate_id_replaces_old_batch():
+    inventory = Inventory()
+    old = _batch("dup", 0.8, 6, kg=100.0)
+    new = _batch("dup", 0.3, 2, kg=40.0)
+    inventory.add_batch(old)
+    inventory.add_batch(new)
+
+    assert len(inventory) == 1
+    assert inventory.find_batch_by_id("dup") is new
+    assert inventory.get_total_stock_kg() == 40.0
+    perfect, alternatives = inventory.get_recommendations(10, 1, "premium")
+    assert perfect == [] and alternatives == [new]
+
+    # The replaced object no longer moves the totals
+    assert inventory.reserve_stock(old, 50) and inventory.get_total_stock_kg() == 40.0
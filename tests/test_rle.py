@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from src import rle
+
+
+def _random_masks():
+    rng = np.random.default_rng(0)
+    for shape in [(1, 1), (7, 5), (40, 90), (128, 64)]:
+        yield rng.random(shape) > 0.5
+        blob = np.zeros(shape, dtype=bool)
+        blob[shape[0] // 4: max(shape[0] // 2, 1), shape[1] // 3: max(shape[1] // 2, 1)] = True
+        yield blob
+
+
+@pytest.mark.parametrize("mask", list(_random_masks()))
+def test_round_trip(mask):
+    encoded = rle.encode(mask, offset=(12, 34))
+    assert encoded["size"] == list(mask.shape)
+    assert rle.offset(encoded) == (12, 34)
+    assert np.array_equal(rle.decode(encoded), mask)
+    assert rle.area(encoded) == int(mask.sum())
+
+
+@pytest.mark.parametrize("mask", list(_random_masks()))
+def test_bbox_matches_nonzero(mask):
+    encoded = rle.encode(mask, offset=(12, 34))
+    if not mask.any():
+        assert rle.bbox(encoded) is None
+        return
+    ys, xs = np.nonzero(mask)
+    assert rle.bbox(encoded) == [12 + xs.min(), 34 + ys.min(), 12 + xs.max() + 1, 34 + ys.max() + 1]
+
+
+def test_bbox_of_run_crossing_columns():
+    mask = np.zeros((4, 3), dtype=bool)
+    mask[3, 0] = mask[0, 1] = True  # One run, split across the column boundary
+    assert rle.bbox(rle.encode(mask)) == [0, 0, 2, 4]
+
+
+def test_all_false_mask():
+    mask = np.zeros((20, 30), dtype=bool)
+    encoded = rle.encode(mask)
+    assert np.array_equal(rle.decode(encoded), mask)
+    assert rle.area(encoded) == 0
+    assert rle.bbox(encoded) is None
+
+
+def test_all_true_mask_starts_with_empty_zero_run():
+    mask = np.ones((6, 4), dtype=bool)
+    encoded = rle.encode(mask)
+    assert list(rle._from_string(encoded["counts"])) == [0, 24]
+    assert np.array_equal(rle.decode(encoded), mask)
+    assert rle.bbox(encoded) == [0, 0, 4, 6]
+
+
+def test_empty_mask():
+    mask = np.zeros((0, 0), dtype=bool)
+    encoded = rle.encode(mask)
+    assert encoded["counts"] == ""
+    assert rle.decode(encoded).shape == (0, 0)
+    assert rle.area(encoded) == 0
+    assert rle.bbox(encoded) is None
+
+
+def test_counts_string_matches_coco():
+    # Column-major runs [5, 2, 2, 2, 5]; from i = 3 on, COCO stores deltas to counts[i - 2]
+    mask = np.zeros((4, 4), dtype=bool)
+    mask[1:3, 1:3] = True
+    assert rle._to_string(rle._runs(mask)) == "52203"
+    assert list(rle._from_string("52203")) == [5, 2, 2, 2, 5]
+
+
+def test_large_counts_round_trip():
+    counts = [0, 1, 100000, 3, 31, 32, 1 << 20]
+    assert list(rle._from_string(rle._to_string(counts))) == counts